@@ -4,7 +4,7 @@ import { useEffect, useState, useCallback, useRef } from 'react';
 import { useParams } from 'next/navigation';
 import PlayerAvatar from '@/components/PlayerAvatar';
 import GameLog from '@/components/GameLog';
-import ActionBar from '@/components/ActionBar';
+import ActionBar, { NightSkills } from '@/components/ActionBar';
 import { joinRoom } from '@/lib/api';
 
 // --- Enums and Types matching the new backend ---
@@ -19,6 +19,7 @@ enum Stage {
     SPEECH = "SPEECH",
     VOTE = "VOTE",
     VOTE_RESOLVE = "VOTE_RESOLVE",
+    DEATH_SKILL = "DEATH_SKILL",
     GAME_OVER = "GAME_OVER",
 }
 
@@ -39,6 +40,7 @@ interface Player {
     role: Role | null;
     is_host: boolean;
     is_ready: boolean;
+    is_bot: boolean;
     seat: number | null;
 }
 
@@ -55,6 +57,10 @@ interface GameState {
         allow_spectators: boolean;
     };
     speech_order: string[];
+    speaker_index: number;
+    pending_shooters: string[];
+    used_day_skills: string[];
+    revealed_idiots: string[];
     winner: 'GOOD' | 'WOLF' | null;
 }
 
@@ -68,6 +74,7 @@ function GamePageContent() {
     const [error, setError] = useState<string | null>(null);
     const [countdown, setCountdown] = useState<number>(0);
     const [myPlayerId, setMyPlayerId] = useState<string | null>(null);
+    const [nightSkills, setNightSkills] = useState<NightSkills | null>(null);
     const socketRef = useRef<WebSocket | null>(null);
 
     const connectWebSocket = useCallback((token: string) => {
@@ -104,16 +111,39 @@ function GamePageContent() {
                     if (dead.length === 0 && !saved && !poisoned) nightLog = "昨夜是平安夜。";
                     setGameLog(prev => [...prev, nightLog]);
                     break;
+                case 'DAY_SKILL_RESULT':
+                    const daySkillLog = `${payload.actor} 号玩家对 ${payload.target} 号玩家发动 ${payload.action}`;
+                    setGameLog(prev => [...prev, `${daySkillLog}, ${payload.dead.length ? payload.dead.join(', ') + ' 号玩家死亡' : '无人死亡'}。`]);
+                    break;
+                case 'NIGHT_SKILLS':
+                    setNightSkills(payload);
+                    break;
+                case 'ACTION_REJECTED':
+                    setGameLog(prev => [...prev, `操作无效: ${payload.action}`]);
+                    break;
+                case 'CHECK_RESULT':
+                    setGameLog(prev => [...prev, `查验结果: ${payload.target} 号玩家是 ${payload.result}。`]);
+                    break;
                 case 'VOTE_RESULT':
-                    const { eliminated, votes } = payload;
+                    const { eliminated, votes, revealed } = payload;
                     const voteLog = Object.entries(votes).map(([voter, target]) => `${voter} -> ${target}`).join('; ');
                     setGameLog(prev => [...prev, `投票结果: ${voteLog}`]);
-                    if (eliminated) {
+                    if (revealed) {
+                        setGameLog(prev => [...prev, `${revealed} 号玩家翻牌为白痴, 免于出局但失去投票权。`]);
+                    } else if (eliminated) {
                         setGameLog(prev => [...prev, `${eliminated} 号玩家被投票出局。`]);
                     } else {
                         setGameLog(prev => [...prev, `平票，无人出局。`]);
                     }
                     break;
+                case 'CHAT':
+                case 'CHAT_HISTORY':
+                    const chatLines = payload.messages.map((m: { player_id: string; text: string }) => `${m.player_id}: ${m.text}`);
+                    setGameLog(prev => [...prev, ...chatLines]);
+                    break;
+                case 'CHAT_REJECTED':
+                    setGameLog(prev => [...prev, `发言失败: ${payload.reason}`]);
+                    break;
                 case 'GAME_OVER':
                     setGameLog(prev => [...prev, `游戏结束! ${payload.winner} 阵营胜利!`]);
                     break;
@@ -190,7 +220,7 @@ function GamePageContent() {
                     <div className={`relative text-center ${!player.is_alive ? 'opacity-40 grayscale' : ''}`}>
                          <PlayerAvatar profile={{id: player.id, name: player.name, avatar_url: player.avatar_url}} />
                          <p className="text-white text-sm font-medium mt-2 truncate">{player.name}</p>
-                         <p className="text-gray-400 text-xs">{player.seat}号位 {player.is_ready ? '✔️' : ''}</p>
+                         <p className="text-gray-400 text-xs">{player.seat}号位 {player.is_bot ? '🤖' : ''} {player.is_ready ? '✔️' : ''}</p>
                     </div>
                 ) : (
                     <div className="flex flex-col items-center justify-center text-center">
@@ -249,6 +279,7 @@ function GamePageContent() {
                         <ActionBar
                           gameState={gameState}
                           myPlayer={me}
+                          nightSkills={nightSkills}
                           onAction={handleAction}
                         />
                     )}
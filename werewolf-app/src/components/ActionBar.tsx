@@ -14,6 +14,7 @@ enum Stage {
     SPEECH = "SPEECH",
     VOTE = "VOTE",
     VOTE_RESOLVE = "VOTE_RESOLVE",
+    DEATH_SKILL = "DEATH_SKILL",
     GAME_OVER = "GAME_OVER",
 }
 
@@ -43,6 +44,7 @@ interface Player {
     role: Role | null;
     is_host: boolean;
     is_ready: boolean;
+    is_bot: boolean;
     seat: number | null;
 }
 
@@ -61,12 +63,23 @@ interface GameState {
     host_id: string;
     game_config: GameConfig;
     speech_order: string[];
+    speaker_index: number;
+    pending_shooters: string[];
+    used_day_skills: string[];
+    revealed_idiots: string[];
     winner: 'GOOD' | 'WOLF' | null;
 }
 
+// Sent privately by the server at the start of NIGHT_SKILLS: the actions this player can use tonight.
+export interface NightSkills {
+  actions: string[];
+  blocked_targets: string[];
+}
+
 interface ActionBarProps {
   gameState: GameState;
   myPlayer: Player;
+  nightSkills: NightSkills | null;
   onAction: (type: string, payload?: object) => void;
 }
 
@@ -90,8 +103,37 @@ const ActionPanel = ({ title, children }: { title: string; children: React.React
 );
 
 
-const ActionBar: React.FC<ActionBarProps> = ({ gameState, myPlayer, onAction }) => {
+const ActionBar: React.FC<ActionBarProps> = ({ gameState, myPlayer, nightSkills, onAction }) => {
   const [selectedTarget, setSelectedTarget] = useState<string | null>(null);
+  const [speechText, setSpeechText] = useState("");
+
+  const handleDaySkill = (action: string) => {
+    onAction("DAY_SKILL", { action, target: selectedTarget });
+    setSelectedTarget(null);
+  };
+
+  // A hunter or wolf king who just died still takes their shot.
+  const renderDeathSkillStage = () => {
+    if (!(gameState.pending_shooters ?? []).includes(myPlayer.id)) {
+      return <div className="text-white">等待开枪...</div>;
+    }
+    const targets = gameState.players.filter(p => p.is_alive && p.id !== myPlayer.id);
+    return (
+      <ActionPanel title="你已出局, 请选择开枪目标">
+        {targets.map(player => (
+          <ActionButton key={player.id} onClick={() => setSelectedTarget(player.id)} className={selectedTarget === player.id ? "bg-orange-500 ring-2 ring-white" : "bg-orange-800"}>
+            {player.name} ({player.seat}号)
+          </ActionButton>
+        ))}
+        <ActionButton onClick={() => handleDaySkill("SHOOT")} disabled={!selectedTarget} className="bg-red-600 mt-4">开枪</ActionButton>
+        <ActionButton onClick={() => onAction("DAY_SKILL", { action: "PASS" })} className="bg-gray-600 mt-4">放弃</ActionButton>
+      </ActionPanel>
+    );
+  };
+
+  if (gameState.stage === Stage.DEATH_SKILL) {
+    return renderDeathSkillStage();
+  }
 
   if (!myPlayer.is_alive) {
     return <div className="text-center text-xl font-semibold text-red-500">你已经出局了</div>;
@@ -104,18 +146,32 @@ const ActionBar: React.FC<ActionBarProps> = ({ gameState, myPlayer, onAction })
   
   const renderWaitingStage = () => {
       return (
-          <ActionButton
-              onClick={() => onAction("READY", { ready: !myPlayer.is_ready })}
-              className={myPlayer.is_ready ? "bg-red-600" : "bg-green-600"}
-            >
-              {myPlayer.is_ready ? '取消准备' : '准备'}
-            </ActionButton>
+          <div className="flex gap-4 justify-center">
+            <ActionButton
+                onClick={() => onAction("READY", { ready: !myPlayer.is_ready })}
+                className={myPlayer.is_ready ? "bg-red-600" : "bg-green-600"}
+              >
+                {myPlayer.is_ready ? '取消准备' : '准备'}
+              </ActionButton>
+            {myPlayer.is_host && (
+              <ActionButton onClick={() => onAction("FILL_BOTS")} className="bg-gray-600">
+                机器人补位
+              </ActionButton>
+            )}
+          </div>
       )
   }
 
   const renderNightSkillsStage = () => {
     const livingPlayers = gameState.players.filter(p => p.is_alive && p.id !== myPlayer.id);
-    const livingPlayersIncludingSelf = gameState.players.filter(p => p.is_alive);
+    const blockedTargets = nightSkills?.blocked_targets ?? [];
+    const livingPlayersIncludingSelf = gameState.players.filter(p => p.is_alive && !blockedTargets.includes(p.id));
+    const actions = nightSkills?.actions ?? [];
+    const canUse = (action: string) => actions.includes(action);
+
+    if (actions.length === 0) {
+      return <div className="text-white">夜晚行动中...请耐心等待。</div>;
+    }
 
     switch (myPlayer.role) {
       case Role.WEREWOLF:
@@ -124,6 +180,7 @@ const ActionBar: React.FC<ActionBarProps> = ({ gameState, myPlayer, onAction })
       case Role.WOLF_BEAUTY:
       case Role.SNOW_WOLF:
       case Role.HIDDEN_WOLF:
+      case Role.EVIL_KNIGHT:
         return (
           <ActionPanel title="狼人请选择击杀目标">
             {livingPlayers.map(player => (
@@ -131,29 +188,43 @@ const ActionBar: React.FC<ActionBarProps> = ({ gameState, myPlayer, onAction })
                 {player.name} ({player.seat}号)
               </ActionButton>
             ))}
-            <ActionButton onClick={() => handleConfirm("KILL")} disabled={!selectedTarget} className="bg-green-600 mt-4">确认击杀</ActionButton>
+            {canUse("KILL") && (
+              <ActionButton onClick={() => handleConfirm("KILL")} disabled={!selectedTarget} className="bg-green-600 mt-4">确认击杀</ActionButton>
+            )}
+            {canUse("CHARM") && (
+              <ActionButton onClick={() => handleConfirm("CHARM")} disabled={!selectedTarget} className="bg-pink-600 mt-4">确认魅惑</ActionButton>
+            )}
           </ActionPanel>
         );
       case Role.SEER:
+      case Role.GARGOYLE:
         return (
-          <ActionPanel title="预言家请查验">
+          <ActionPanel title={myPlayer.role === Role.GARGOYLE ? "石像鬼请查验" : "预言家请查验"}>
             {livingPlayers.map(player => (
               <ActionButton key={player.id} onClick={() => setSelectedTarget(player.id)} className={selectedTarget === player.id ? "bg-blue-500 ring-2 ring-white" : "bg-blue-800"}>
                 查验 {player.name} ({player.seat}号)
               </ActionButton>
             ))}
             <ActionButton onClick={() => handleConfirm("CHECK")} disabled={!selectedTarget} className="bg-green-600 mt-4">确认查验</ActionButton>
+            {canUse("KILL") && (
+              <ActionButton onClick={() => handleConfirm("KILL")} disabled={!selectedTarget} className="bg-red-600 mt-4">确认击杀</ActionButton>
+            )}
           </ActionPanel>
         );
       case Role.WITCH:
         return (
           <ActionPanel title="女巫请用药">
-            <ActionButton onClick={() => handleConfirm("SAVE")} className="bg-green-700">使用解药</ActionButton>
-            {livingPlayers.map(player => (
+            {canUse("SAVE") && (
+              <ActionButton onClick={() => handleConfirm("SAVE")} className="bg-green-700">使用解药</ActionButton>
+            )}
+            {canUse("POISON") && livingPlayers.map(player => (
               <ActionButton key={player.id} onClick={() => handleConfirm("POISON", player.id)} className="bg-purple-800">
                 毒杀 {player.name} ({player.seat}号)
               </ActionButton>
             ))}
+            {canUse("PASS") && (
+              <ActionButton onClick={() => onAction("ACTION", { action: "PASS" })} className="bg-gray-600">不使用药</ActionButton>
+            )}
           </ActionPanel>
         );
       case Role.GUARD:
@@ -167,14 +238,15 @@ const ActionBar: React.FC<ActionBarProps> = ({ gameState, myPlayer, onAction })
               <ActionButton onClick={() => handleConfirm("GUARD")} disabled={!selectedTarget} className="bg-green-600 mt-4">确认守护</ActionButton>
             </ActionPanel>
           );
-      case Role.KNIGHT:
-        return <div className="text-white">骑士请在白天行动。</div>;
       default:
         return <div className="text-white">夜晚行动中...请耐心等待。</div>;
     }
   };
   
   const renderVoteStage = () => {
+      if ((gameState.revealed_idiots ?? []).includes(myPlayer.id)) {
+          return <div className="text-white">白痴已翻牌, 不能投票。</div>
+      }
       const livingPlayers = gameState.players.filter(p => p.is_alive);
        return (
           <ActionPanel title="投票放逐">
@@ -191,19 +263,62 @@ const ActionBar: React.FC<ActionBarProps> = ({ gameState, myPlayer, onAction })
         );
   }
   
+  // Knight duel and White Wolf King self-destruct can be used once, any time during SPEECH.
+  const renderDaySkill = () => {
+      const daySkill = myPlayer.role === Role.KNIGHT ? { action: "DUEL", label: "决斗" }
+          : myPlayer.role === Role.WHITE_WOLF_KING ? { action: "SELF_DESTRUCT", label: "自爆带人" }
+          : null;
+      if (!daySkill || (gameState.used_day_skills ?? []).includes(myPlayer.id)) return null;
+      const targets = gameState.players.filter(p => p.is_alive && p.id !== myPlayer.id);
+      return (
+          <div className="flex flex-wrap gap-2 justify-center mt-2">
+            <select
+              value={selectedTarget ?? ""}
+              onChange={e => setSelectedTarget(e.target.value || null)}
+              className="px-3 py-2 rounded-lg bg-gray-800 text-white"
+            >
+              <option value="">选择目标</option>
+              {targets.map(player => (
+                <option key={player.id} value={player.id}>{player.name} ({player.seat}号)</option>
+              ))}
+            </select>
+            <ActionButton onClick={() => handleDaySkill(daySkill.action)} disabled={!selectedTarget} className="bg-red-700">
+              {daySkill.label}
+            </ActionButton>
+          </div>
+      );
+  }
+
   const renderSpeechStage = () => {
       if (!gameState.speech_order || gameState.speech_order.length === 0) {
           return <div className="text-white">等待发言顺序...</div>
       }
-      const amISpeaking = gameState.speech_order[0] === myPlayer.id;
+      const speakerId = gameState.speech_order[gameState.speaker_index ?? 0];
+      const amISpeaking = speakerId === myPlayer.id;
       if (amISpeaking) {
+          const sendSpeech = () => {
+              if (!speechText.trim()) return;
+              onAction("CHAT", { text: speechText });
+              setSpeechText("");
+          };
           return (
-              <ActionButton onClick={() => onAction("SPEECH_DONE", { playerId: myPlayer.id })} className="bg-gray-600">
-                结束发言
-              </ActionButton>
+              <div className="flex gap-2 justify-center">
+                <input
+                  value={speechText}
+                  onChange={e => setSpeechText(e.target.value)}
+                  onKeyDown={e => { if (e.key === 'Enter') sendSpeech(); }}
+                  maxLength={200}
+                  className="px-3 py-2 rounded-lg bg-gray-800 text-white"
+                  placeholder="发言..."
+                />
+                <ActionButton onClick={sendSpeech} disabled={!speechText.trim()} className="bg-blue-600">发送</ActionButton>
+                <ActionButton onClick={() => onAction("SPEECH_DONE", { playerId: myPlayer.id })} className="bg-gray-600">
+                  结束发言
+                </ActionButton>
+              </div>
           )
       }
-      const speaker = gameState.players.find(p => p.id === gameState.speech_order[0]);
+      const speaker = gameState.players.find(p => p.id === speakerId);
       return <div className="text-white">听 {speaker?.name || '...'} 发言...</div>
   }
 
@@ -215,7 +330,12 @@ const ActionBar: React.FC<ActionBarProps> = ({ gameState, myPlayer, onAction })
     case Stage.VOTE:
         return renderVoteStage();
     case Stage.SPEECH:
-        return renderSpeechStage();
+        return (
+          <div className="flex flex-col items-center">
+            {renderSpeechStage()}
+            {renderDaySkill()}
+          </div>
+        );
     case Stage.GAME_OVER:
         return <div className="text-2xl font-bold text-yellow-400">游戏结束! {gameState.winner} 阵营胜利!</div>
     default:
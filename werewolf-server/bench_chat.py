@@ -0,0 +1,143 @@
+"""
+Chat relay throughput benchmark.
+
+Simulates ROOMS rooms of PLAYERS connected sockets, all chatting at once:
+
+- lobby:  every player sends bursts of BURST_SIZE lines every BURST_PERIOD
+          seconds (within the token bucket), so several accepted messages land
+          in the same CHAT_FLUSH_INTERVAL window and share a frame.
+- speech: only the current speaker may talk, and they try to send
+          SPEECH_ATTEMPT_RATE messages per second, well above the token bucket;
+          this measures the rate limiter rather than coalescing.
+
+For each scenario it reports post() cost, messages per frame, socket sends and
+post-to-delivery latency (sampled on one socket per room).
+
+    python bench_chat.py [rooms] [seconds]
+"""
+import asyncio
+import json
+import sys
+import time
+
+from models import GameConfig, GameState, Player, Stage
+from connections import ConnectionManager
+from chat import CHAT_FLUSH_INTERVAL, ChatRelay
+
+PLAYERS = 12
+TICK = 0.01              # seconds between posting rounds; well under the flush interval
+BURST_SIZE = 3
+BURST_PERIOD = 1.5       # seconds; 2 msg/s per player on average, like the bucket
+SPEECH_ATTEMPT_RATE = 10 # messages per second tried by each speaker
+
+class CountingSocket:
+    """Stands in for a WebSocket; counts sends and, if sampling, records delivery latency."""
+    sends = 0
+    bytes = 0
+    latencies = []
+
+    def __init__(self, sample: bool = False):
+        self.sample = sample
+
+    async def send_text(self, message: str):
+        CountingSocket.sends += 1
+        CountingSocket.bytes += len(message)
+        if self.sample:
+            now = time.time()
+            CountingSocket.latencies.extend(now - m["ts"] for m in json.loads(message)["payload"]["messages"])
+
+    @classmethod
+    def reset(cls):
+        cls.sends = 0
+        cls.bytes = 0
+        cls.latencies = []
+
+def make_room(index: int, stage: Stage, connections: ConnectionManager) -> GameState:
+    room_id = f"R{index:05d}"
+    players = [Player(id=f"P{100 + i}", name=str(i), seat=i) for i in range(PLAYERS)]
+    game = GameState(
+        room_id=room_id,
+        host_id=players[0].id,
+        players=players,
+        game_config=GameConfig(template_name="bench"),
+        stage=stage,
+        speech_order=[p.id for p in players],
+    )
+    connections.active_connections[room_id] = {p.id: CountingSocket(sample=i == 0) for i, p in enumerate(players)}
+    return game
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def lobby_schedule(games):
+    """Every player bursts BURST_SIZE lines every BURST_PERIOD, at a staggered phase."""
+    period = round(BURST_PERIOD / TICK)
+    slots = [[] for _ in range(period)]
+    for room_index, game in enumerate(games):
+        for i, player in enumerate(game.players):
+            slots[(room_index * 7 + i * 13) % period].append((game, player.id, BURST_SIZE))
+    return slots
+
+def speech_schedule(games):
+    """The current speaker of every room tries SPEECH_ATTEMPT_RATE messages per second."""
+    period = max(1, round(1 / (SPEECH_ATTEMPT_RATE * TICK)))
+    slots = [[] for _ in range(period)]
+    for room_index, game in enumerate(games):
+        slots[room_index % period].append((game, game.speech_order[game.speaker_index], 1))
+    return slots
+
+async def run(name: str, stage: Stage, build_schedule, rooms: int, seconds: float):
+    CountingSocket.reset()
+    connections = ConnectionManager()
+    relay = ChatRelay(connections)
+    games = [make_room(i, stage, connections) for i in range(rooms)]
+    # slots[tick % len(slots)] lists the (game, player_id, count) posts due on that tick.
+    slots = build_schedule(games)
+
+    accepted = rejected = 0
+    post_time = 0.0
+    tick = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        # Catch up on ticks missed while the loop was busy sending, so the offered load stays fixed.
+        due = int((time.perf_counter() - started) / TICK)
+        tick_start = time.perf_counter()
+        while tick <= due:
+            for game, player_id, count in slots[tick % len(slots)]:
+                for _ in range(count):
+                    if relay.post(game, player_id, "我是好人, 过。") is None:
+                        accepted += 1
+                    else:
+                        rejected += 1
+            tick += 1
+        post_time += time.perf_counter() - tick_start
+        await asyncio.sleep(max(0.0, started + tick * TICK - time.perf_counter()))
+    # Let the last window go out through the regular flusher before measuring.
+    await asyncio.sleep(CHAT_FLUSH_INTERVAL * 2)
+    relay.flush()
+    await relay.drain()
+    elapsed = time.perf_counter() - started
+
+    frames = CountingSocket.sends / PLAYERS
+    attempts = accepted + rejected
+    latencies = CountingSocket.latencies
+    print(f"[{name}] rooms={rooms} players/room={PLAYERS} duration={elapsed:.2f}s")
+    print(f"  attempts={attempts} accepted={accepted} rate-limited={rejected}")
+    print(f"  post() cost: {post_time / max(attempts, 1) * 1e6:.2f} us/message")
+    print(f"  frames={frames:.0f} ({frames / elapsed:.0f}/s), messages/frame={accepted / max(frames, 1):.2f}")
+    print(f"  socket sends={CountingSocket.sends} ({CountingSocket.sends / elapsed:.0f}/s), "
+          f"{CountingSocket.bytes / elapsed / 1e6:.2f} MB/s")
+    print(f"  post->delivery latency: p50={percentile(latencies, 0.5) * 1e3:.1f} ms "
+          f"p99={percentile(latencies, 0.99) * 1e3:.1f} ms max={max(latencies, default=0) * 1e3:.1f} ms "
+          f"(n={len(latencies)})")
+
+async def main(rooms: int, seconds: float):
+    await run("lobby", Stage.WAITING, lobby_schedule, rooms, seconds)
+    await run("speech", Stage.SPEECH, speech_schedule, rooms, seconds)
+
+if __name__ == "__main__":
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    asyncio.run(main(rooms, seconds))
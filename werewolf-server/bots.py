@@ -0,0 +1,208 @@
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from models import GameState, Player, Role, Stage
+from roles import NightPlan, ROLE_REGISTRY
+
+# Seconds a bot may spend deciding before it falls back to a random move.
+BOT_DECISION_BUDGET = 1.0
+BOT_WORKERS = 4
+# Submissions per action before a bot gives up; each retry uses a fresh fallback target.
+BOT_SUBMIT_ATTEMPTS = 3
+
+ActionSubmitter = Callable[[str, str, str, Optional[str]], Awaitable[bool]]
+VoteSubmitter = Callable[[str, str, str], Awaitable[None]]
+
+# 1. 机器人视角 (Bot View)
+class BotView:
+    """
+    Snapshot of what one bot is allowed to know, taken under the room lock.
+    Strategies only ever see this snapshot, so they are safe to run off the event loop.
+    """
+    __slots__ = (
+        "bot_id", "role", "alive", "teammates", "known", "actions",
+        "last_guarded", "witch_has_save", "witch_has_poison", "pack_target",
+    )
+
+    def __init__(self, game: GameState, bot: Player, known: Dict[str, str], actions: List[str]):
+        spec = ROLE_REGISTRY[bot.role]
+        self.bot_id = bot.id
+        self.role = bot.role
+        self.alive = [p.id for p in game.players if p.is_alive]
+        # Wolves that open their eyes together know each other.
+        self.teammates = set()
+        if spec.faction == "WOLF" and not spec.inherits_kill:
+            self.teammates = {
+                p.id for p in game.players
+                if p.role and ROLE_REGISTRY[p.role].faction == "WOLF" and not ROLE_REGISTRY[p.role].inherits_kill
+            }
+        self.known = dict(known)
+        self.actions = actions
+        self.last_guarded = game.last_guarded
+        self.witch_has_save = game.witch_has_save
+        self.witch_has_poison = game.witch_has_poison
+        self.pack_target: Optional[str] = None
+
+def build_night_views(game: GameState, plan: NightPlan, memory: Dict[str, Dict[str, str]]) -> List[BotView]:
+    views = []
+    for bot in game.players:
+        if not bot.is_bot or not bot.is_alive or not bot.role:
+            continue
+        actions = plan.available_actions(game, bot)
+        if actions:
+            views.append(BotView(game, bot, memory.get(bot.id, {}), actions))
+
+    # Bot wolves agree on one target instead of splitting their votes.
+    killers = [view for view in views if "KILL" in view.actions]
+    if killers:
+        pack_target = choose_kill_target(killers[0])
+        for view in killers:
+            view.pack_target = pack_target
+    return views
+
+def build_vote_views(game: GameState, memory: Dict[str, Dict[str, str]]) -> List[BotView]:
+    return [
+        BotView(game, bot, memory.get(bot.id, {}), [])
+        for bot in game.players
+        if bot.is_bot and bot.is_alive and bot.role
+    ]
+
+def build_shot_views(game: GameState, memory: Dict[str, Dict[str, str]], shooters: List[str]) -> List[BotView]:
+    """Views for dead bot shooters; their shot reuses the vote heuristic."""
+    return [
+        BotView(game, bot, memory.get(bot.id, {}), [])
+        for bot in game.players
+        if bot.is_bot and bot.id in shooters
+    ]
+
+# 2. 启发式策略 (Heuristic Strategies)
+def _pick(candidates: List[str]) -> Optional[str]:
+    return random.choice(candidates) if candidates else None
+
+def _is_known_god(result: str) -> bool:
+    try:
+        return ROLE_REGISTRY[Role(result)].team == "GOD"
+    except ValueError:
+        return False
+
+def choose_kill_target(view: BotView) -> Optional[str]:
+    outsiders = [pid for pid in view.alive if pid != view.bot_id and pid not in view.teammates]
+    gods = [pid for pid in outsiders if _is_known_god(view.known.get(pid, ""))]
+    return _pick(gods or outsiders)
+
+def decide_night(view: BotView) -> Dict[str, Optional[str]]:
+    """Chooses this bot's night actions as {action: target}."""
+    outsiders = [pid for pid in view.alive if pid != view.bot_id and pid not in view.teammates]
+
+    if view.role == Role.WITCH:
+        if view.witch_has_save:
+            return {"SAVE": None}
+        # Poisoning blindly hurts the good side more often than not; pass instead.
+        return {"PASS": None}
+
+    decision: Dict[str, Optional[str]] = {}
+    for action in view.actions:
+        if action == "KILL":
+            decision[action] = view.pack_target or choose_kill_target(view)
+        elif action == "CHARM":
+            decision[action] = _pick(outsiders)
+        elif action == "CHECK":
+            unchecked = [pid for pid in outsiders if pid not in view.known]
+            decision[action] = _pick(unchecked or outsiders)
+        elif action == "GUARD":
+            decision[action] = _pick([pid for pid in view.alive if pid != view.last_guarded])
+    return decision
+
+def fallback_target(view: BotView, action: str) -> Optional[str]:
+    """A target that is valid for `action`, used when a strategy fails or its move is rejected."""
+    if action == "GUARD":
+        return _pick([pid for pid in view.alive if pid != view.last_guarded])
+    if action in ("SAVE", "PASS"):
+        return None
+    return _pick([pid for pid in view.alive if pid != view.bot_id and pid not in view.teammates])
+
+def fallback_night(view: BotView) -> Dict[str, Optional[str]]:
+    if "PASS" in view.actions:
+        return {"PASS": None}
+    return {
+        action: view.pack_target if action == "KILL" and view.pack_target else fallback_target(view, action)
+        for action in view.actions
+    }
+
+def decide_vote(view: BotView) -> Optional[str]:
+    """Chooses who this bot votes to eliminate."""
+    others = [pid for pid in view.alive if pid != view.bot_id]
+    if ROLE_REGISTRY[view.role].faction == "WOLF":
+        return _pick([pid for pid in others if pid not in view.teammates])
+
+    known_wolves = [pid for pid in others if view.known.get(pid) == "WOLF"]
+    if known_wolves:
+        return _pick(known_wolves)
+    return _pick([pid for pid in others if view.known.get(pid) != "GOOD"] or others)
+
+# 3. 机器人管理器 (Bot Manager)
+class BotManager:
+    """Runs bot decisions in a worker pool and submits them like real clients."""
+
+    def __init__(self, max_workers: int = BOT_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bot")
+        self.memory: Dict[str, Dict[str, Dict[str, str]]] = {}
+        # The event loop only keeps weak references to tasks, so running bot tasks are held here.
+        self._tasks: Dict[str, Set[asyncio.Task]] = {}
+
+    def room_memory(self, room_id: str) -> Dict[str, Dict[str, str]]:
+        return self.memory.setdefault(room_id, {})
+
+    def observe_check(self, room_id: str, bot_id: str, target: str, result: str):
+        self.room_memory(room_id).setdefault(bot_id, {})[target] = result
+
+    def forget(self, room_id: str):
+        self.memory.pop(room_id, None)
+        for task in self._tasks.pop(room_id, ()):
+            task.cancel()
+
+    async def _decide(self, strategy: Callable, view: BotView):
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self._pool, strategy, view), BOT_DECISION_BUDGET)
+        except asyncio.TimeoutError:
+            print(f"Bot {view.bot_id} exceeded its decision budget; falling back to a random move.")
+            return None
+        except Exception as e:
+            print(f"Bot {view.bot_id} strategy failed: {e!r}; falling back to a random move.")
+            return None
+
+    async def _run_night(self, room_id: str, view: BotView, submit: ActionSubmitter):
+        decision = await self._decide(decide_night, view)
+        if decision is None:
+            decision = fallback_night(view)
+        for action, target in decision.items():
+            for _ in range(BOT_SUBMIT_ATTEMPTS):
+                if await submit(room_id, view.bot_id, action, target):
+                    break
+                target = fallback_target(view, action)
+
+    async def _run_vote(self, room_id: str, view: BotView, submit: VoteSubmitter):
+        target = await self._decide(decide_vote, view)
+        if target is None:
+            target = _pick([pid for pid in view.alive if pid != view.bot_id])
+        if target:
+            await submit(room_id, view.bot_id, target)
+
+    def schedule(self, room_id: str, stage: Stage, views: List[BotView], submit: Callable):
+        """Starts one decision task per bot; must be called from the event loop. Shots run like votes."""
+        run = self._run_night if stage == Stage.NIGHT_SKILLS else self._run_vote
+        tasks = self._tasks.setdefault(room_id, set())
+        for view in views:
+            task = asyncio.create_task(run(room_id, view, submit))
+            tasks.add(task)
+            task.add_done_callback(lambda t, room_id=room_id: self._task_done(room_id, t))
+
+    def _task_done(self, room_id: str, task: asyncio.Task):
+        self._tasks.get(room_id, set()).discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"Error: bot task in room {room_id} failed: {task.exception()!r}")
+
+bot_manager = BotManager()
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from models import GameState, Stage
+from connections import ConnectionManager, connection_manager
+
+CHAT_FLUSH_INTERVAL = 0.05  # seconds between frames
+CHAT_HISTORY_SIZE = 100     # messages kept per room for late joiners
+CHAT_MAX_LENGTH = 200
+CHAT_RATE = 2.0             # tokens refilled per second
+CHAT_BURST = 5              # bucket capacity
+CHAT_SEND_TIMEOUT = 2.0     # seconds before a stalled socket is dropped
+
+# Stages where anyone in the room may talk; during SPEECH only the current speaker may.
+FREE_CHAT_STAGES = {Stage.WAITING, Stage.GAME_OVER}
+
+class TokenBucket:
+    """Per-player rate limiter: `rate` messages per second with bursts of up to `capacity`."""
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float = CHAT_RATE, capacity: int = CHAT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def consume(self, now: float) -> bool:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class RoomChat:
+    __slots__ = ("pending", "history", "buckets")
+
+    def __init__(self):
+        self.pending: List[dict] = []
+        self.history: Deque[dict] = deque(maxlen=CHAT_HISTORY_SIZE)
+        self.buckets: Dict[str, TokenBucket] = {}
+
+def current_speaker(game: GameState) -> Optional[str]:
+    if game.speaker_index < len(game.speech_order):
+        return game.speech_order[game.speaker_index]
+    return None
+
+class ChatRelay:
+    """
+    Collects chat messages and relays them to the room in frames.
+    `post` never awaits, so it needs no game lock: the speech-order check and
+    the enqueue happen atomically on the event loop. A single flusher task
+    starts one pre-encoded frame per dirty room every CHAT_FLUSH_INTERVAL;
+    each frame is sent in its own task so a slow room never delays the others.
+    """
+
+    def __init__(self, connections: ConnectionManager = connection_manager):
+        self.connections = connections
+        self.rooms: Dict[str, RoomChat] = {}
+        self._dirty: Set[str] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._sending: Dict[str, asyncio.Task] = {}
+
+    def post(self, game: GameState, player_id: str, text: str) -> Optional[str]:
+        """Queues a message. Returns a rejection reason, or None on success."""
+        if not isinstance(text, str):
+            return "Message must be a string."
+        text = text.strip()
+        if not text:
+            return "Empty message."
+        if len(text) > CHAT_MAX_LENGTH:
+            return f"Message is longer than {CHAT_MAX_LENGTH} characters."
+
+        player = next((p for p in game.players if p.id == player_id), None)
+        if not player:
+            return "Player not found."
+        if game.stage == Stage.SPEECH:
+            if current_speaker(game) != player_id:
+                return "It is not your turn to speak."
+        elif game.stage not in FREE_CHAT_STAGES:
+            return "Chat is closed at this stage."
+
+        room = self.rooms.get(game.room_id)
+        if room is None:
+            room = self.rooms[game.room_id] = RoomChat()
+        bucket = room.buckets.get(player_id)
+        if bucket is None:
+            bucket = room.buckets[player_id] = TokenBucket()
+        now = time.monotonic()
+        if not bucket.consume(now):
+            return "You are sending messages too fast."
+
+        message = {"player_id": player_id, "text": text, "ts": time.time()}
+        room.pending.append(message)
+        room.history.append(message)
+        self._dirty.add(game.room_id)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+        return None
+
+    def history(self, room_id: str) -> List[dict]:
+        room = self.rooms.get(room_id)
+        return list(room.history) if room else []
+
+    async def _flush_loop(self):
+        while self._dirty:
+            await asyncio.sleep(CHAT_FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        """
+        Starts sending a frame for every dirty room without waiting for it.
+        A room whose previous frame is still in flight stays dirty until the
+        next tick, which keeps its frames in order.
+        """
+        dirty, self._dirty = self._dirty, set()
+        for room_id in dirty:
+            in_flight = self._sending.get(room_id)
+            if in_flight is not None and not in_flight.done():
+                self._dirty.add(room_id)
+                continue
+            room = self.rooms[room_id]
+            messages, room.pending = room.pending, []
+            if messages:
+                frame = json.dumps({"type": "CHAT", "payload": {"messages": messages}}, ensure_ascii=False)
+                self._sending[room_id] = asyncio.create_task(self._send_frame(room_id, frame))
+
+    async def drain(self):
+        """Waits until every frame in flight has been sent."""
+        await asyncio.gather(*self._sending.values(), return_exceptions=True)
+
+    async def _send_frame(self, room_id: str, frame: str):
+        try:
+            await self.connections.broadcast_text(room_id, frame, CHAT_SEND_TIMEOUT)
+        except Exception as e:
+            print(f"Error: failed to send chat frame to room {room_id}: {e!r}")
+        finally:
+            self._sending.pop(room_id, None)
+
+chat_relay = ChatRelay()
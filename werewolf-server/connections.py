@@ -1,9 +1,11 @@
+import asyncio
 from fastapi import WebSocket
-from typing import Dict
+from typing import Dict, Optional, Set
 
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
+        self._closing: Set[asyncio.Task] = set()
 
     async def connect(self, websocket: WebSocket, room_id: str, player_id: str):
         await websocket.accept()
@@ -11,8 +13,11 @@ class ConnectionManager:
             self.active_connections[room_id] = {}
         self.active_connections[room_id][player_id] = websocket
 
-    def disconnect(self, room_id: str, player_id: str):
+    def disconnect(self, room_id: str, player_id: str, websocket: Optional[WebSocket] = None):
+        """Removes a player's connection; with `websocket` given, only if it is still the registered one."""
         if room_id in self.active_connections and player_id in self.active_connections[room_id]:
+            if websocket is not None and self.active_connections[room_id][player_id] is not websocket:
+                return
             del self.active_connections[room_id][player_id]
             if not self.active_connections[room_id]:
                 del self.active_connections[room_id]
@@ -22,6 +27,44 @@ class ConnectionManager:
             for connection in self.active_connections[room_id].values():
                 await connection.send_json(message)
 
+    async def broadcast_text(self, room_id: str, message: str, timeout: Optional[float] = None):
+        """
+        Sends an already-encoded message to the whole room, one socket after another.
+        The whole frame shares one `timeout`; the connection that raises or is
+        still sending when it expires is dropped, and the rest get a fresh budget.
+        """
+        if room_id not in self.active_connections:
+            return
+        targets = list(self.active_connections[room_id].items())
+        index = 0
+        while index < len(targets):
+            try:
+                async with asyncio.timeout(timeout):
+                    while index < len(targets):
+                        await targets[index][1].send_text(message)
+                        index += 1
+            except Exception as e:
+                player_id, connection = targets[index]
+                print(f"Dropping connection {room_id}/{player_id}: {e!r}")
+                self.drop(room_id, player_id, connection)
+                index += 1
+
+    def drop(self, room_id: str, player_id: str, websocket: WebSocket):
+        """
+        Unregisters a connection that failed mid-send and closes it, so the
+        client notices and reconnects instead of silently missing updates.
+        """
+        self.disconnect(room_id, player_id, websocket)
+        task = asyncio.create_task(self._close(websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=1011)
+        except Exception:
+            pass  # Already closed or broken; nothing more to do.
+
     async def send_to_player(self, room_id: str, player_id: str, message: dict):
         if room_id in self.active_connections and player_id in self.active_connections[room_id]:
             await self.active_connections[room_id][player_id].send_json(message)
@@ -1,70 +1,80 @@
+import random
 from collections import Counter
-from typing import List, Optional, Dict
-from models import GameState, Player, Role, NightResultPayload, VoteResultPayload
+from typing import List, Optional, Dict, Tuple
+from models import GameState, Player, Role, NightResultPayload, VoteResultPayload, CheckResultPayload, DaySkillPayload
+from roles import DAY_SKILLS, NightPlan, ROLE_REGISTRY, shoots_on_death
 
-def process_night_actions(game: GameState) -> NightResultPayload:
+def _kill_players(game: GameState, dead_players: List[str]) -> List[str]:
+    """
+    Marks players as dead and applies linked deaths.
+    - Wolf Beauty: the charmed player dies with her.
+    Returns the ids of players that died as a consequence of the original deaths.
+    """
+    linked = []
+    alive = {p.id for p in game.players if p.is_alive}
+    for player in game.players:
+        if player.id in dead_players and player.role == Role.WOLF_BEAUTY and game.charmed in alive:
+            if game.charmed not in dead_players and game.charmed not in linked:
+                linked.append(game.charmed)
+
+    for player in game.players:
+        if player.id in dead_players or player.id in linked:
+            player.is_alive = False
+    return linked
+
+def collect_shooters(game: GameState, dead: List[str], poisoned: Optional[str] = None):
+    """
+    Queues the dead players who may shoot on death; a poisoned shooter loses the shot.
+    Callers pass only direct deaths: a player who dies with the Wolf Beauty (殉情) cannot shoot.
+    """
+    roles = {p.id: p.role for p in game.players}
+    for player_id in dead:
+        if player_id != poisoned and shoots_on_death(roles.get(player_id)) and player_id not in game.pending_shooters:
+            game.pending_shooters.append(player_id)
+
+def process_night_actions(game: GameState, plan: NightPlan) -> Tuple[NightResultPayload, Dict[str, CheckResultPayload]]:
     """
     Processes all recorded night actions and determines the outcome.
+    - Runs the room's compiled night plan (guard, wolves, witch, seer, ...).
     - Resolves werewolf kill vs. guard protection vs. witch save.
-    - Resolves witch poison.
-    - Resolves seer check.
+    - Resolves witch poison and Evil Knight reflections.
+    - Queues the night's dead shooters for DEATH_SKILL.
+    Returns the public result and the private check results keyed by checker id.
     """
-    actions = game.night_actions
+    ctx = plan.resolve(game)
     dead_players = []
-    saved_by_witch = None
-    poisoned_by_witch = None
-    seer_check_result = None
-
-    # 1. Determine Werewolf Kill Target
-    wolf_votes = [
-        action['target']
-        for actor_id, action in actions.items()
-        if game.players[int(actor_id[1:])].role == Role.WEREWOLF and action.get('action') == 'KILL' and action.get('target')
-    ]
-    kill_target = Counter(wolf_votes).most_common(1)[0][0] if wolf_votes else None
-
-    # 2. Guard's Protection
-    guard_action = next((a for a in actions.values() if a.get('action') == 'GUARD'), None)
-    guarded_player = guard_action['target'] if guard_action else None
-
-    # 3. Witch's Actions
-    witch_action = next((a for a in actions.values() if a.get('action') in ['SAVE', 'POISON']), None)
-    
-    # 4. Resolve Deaths
-    # Death by werewolf
-    if kill_target and kill_target != guarded_player:
-        if witch_action and witch_action.get('action') == 'SAVE' and game.witch_has_save:
-            saved_by_witch = kill_target
-            game.witch_has_save = False
-        else:
+
+    # Death by werewolf: guarded or saved survives, but guarded and saved (同守同救) dies.
+    kill_target = ctx.kill_target
+    kill_spec = ctx.spec_of(kill_target) if kill_target else None
+    if kill_spec and not kill_spec.night_immune:
+        if (kill_target == ctx.guarded) == (kill_target == ctx.saved):
             dead_players.append(kill_target)
 
     # Death by poison
-    if witch_action and witch_action.get('action') == 'POISON' and game.witch_has_poison:
-        poisoned_by_witch = witch_action['target']
-        if poisoned_by_witch not in dead_players:
-            dead_players.append(poisoned_by_witch)
-        game.witch_has_poison = False
-
-    # 5. Seer's Check
-    seer_action = next((a for a in actions.values() if a.get('action') == 'CHECK'), None)
-    if seer_action and seer_action.get('target'):
-        target_id = seer_action['target']
-        target_player = next((p for p in game.players if p.id == target_id), None)
-        if target_player:
-            seer_check_result = {target_id: target_player.role}
-
-    # 6. Update player statuses
-    for player in game.players:
-        if player.id in dead_players:
-            player.is_alive = False
-
+    poison_spec = ctx.spec_of(ctx.poisoned) if ctx.poisoned else None
+    if poison_spec and not poison_spec.night_immune:
+        if ctx.poisoned not in dead_players:
+            dead_players.append(ctx.poisoned)
+
+    # Death by Evil Knight reflection
+    for reflected in ctx.reflected:
+        if reflected not in dead_players:
+            dead_players.append(reflected)
+
+    linked = _kill_players(game, dead_players)
+    collect_shooters(game, dead_players, ctx.poisoned)
+    dead_players.extend(linked)
+
+    checks = {
+        actor_id: CheckResultPayload(target=target, result=result)
+        for actor_id, (target, result) in ctx.checks.items()
+    }
     return NightResultPayload(
         dead=dead_players,
-        saved=saved_by_witch,
-        poisoned=poisoned_by_witch,
-        checked=seer_check_result
-    )
+        saved=ctx.saved,
+        poisoned=ctx.poisoned,
+    ), checks
 
 def process_day_votes(game: GameState) -> VoteResultPayload:
     """
@@ -84,18 +94,35 @@ def process_day_votes(game: GameState) -> VoteResultPayload:
     # Determine eliminated player
     eliminated_player_id = vote_counts.most_common(1)[0][0] if vote_counts else None
     
+    linked_dead = []
     if eliminated_player_id:
         player = next((p for p in game.players if p.id == eliminated_player_id), None)
         if player:
-            # Special case for Idiot
-            if player.role == Role.IDIOT:
-                # The idiot is revealed but not eliminated. They lose voting rights.
-                # This logic can be handled in the game manager after receiving the result.
-                pass 
-            else:
-                player.is_alive = False
+            # The Idiot is revealed instead of eliminated the first time, and loses the vote.
+            if ROLE_REGISTRY[player.role].reveals_on_vote and player.id not in game.revealed_idiots:
+                game.revealed_idiots.append(player.id)
+                return VoteResultPayload(eliminated=None, votes=game.day_votes, revealed=player.id)
+            linked_dead = _kill_players(game, [player.id])
+            collect_shooters(game, [player.id])
 
-    return VoteResultPayload(eliminated=eliminated_player_id, votes=game.day_votes)
+    return VoteResultPayload(eliminated=eliminated_player_id, votes=game.day_votes, linked_dead=linked_dead)
+
+def process_day_skill(game: GameState, actor_id: str, action: str, skill: str, target_id: str) -> DaySkillPayload:
+    """
+    Resolves one use of a day skill (shot, duel, self-destruct) that has already
+    been validated by `roles.day_skill_for`.
+    - Applies the deaths, including linked ones, and queues any new shooters.
+    - Marks the day as ended if the skill ends it.
+    """
+    outcome = DAY_SKILLS[skill](game, actor_id, target_id)
+    alive = {p.id for p in game.players if p.is_alive}
+    dead = [pid for pid in outcome.dead if pid in alive]
+    linked = _kill_players(game, dead)
+    collect_shooters(game, dead)
+    dead.extend(linked)
+    if outcome.ends_day:
+        game.day_ended = True
+    return DaySkillPayload(actor=actor_id, action=action, target=target_id, dead=dead)
 
 def determine_speech_order(game: GameState) -> List[str]:
     """
@@ -134,21 +161,28 @@ def check_game_over(game: GameState) -> bool:
     """
     Checks if the game has reached a conclusion.
     Updates game.winner if it has.
+    Teams and factions come from the role registry, so every role counts.
     """
-    living_players = [p for p in game.players if p.is_alive]
-    good_roles = {Role.VILLAGER, Role.SEER, Role.WITCH, Role.HUNTER, Role.IDIOT}
-    
-    living_gods = [p for p in living_players if p.role in {Role.SEER, Role.WITCH, Role.HUNTER, Role.IDIOT}]
-    living_villagers = [p for p in living_players if p.role == Role.VILLAGER]
-    living_wolves = [p for p in living_players if p.role == Role.WEREWOLF]
+    teams = Counter()
+    living_teams = Counter()
+    living_wolves = 0
+    for p in game.players:
+        if not p.role:
+            continue
+        spec = ROLE_REGISTRY[p.role]
+        teams[spec.team] += 1
+        if p.is_alive:
+            living_teams[spec.team] += 1
+            if spec.faction == "WOLF":
+                living_wolves += 1
 
     # Rule: Kill all gods
-    if not living_gods:
+    if teams["GOD"] and not living_teams["GOD"]:
         game.winner = "WOLF"
         return True
 
     # Rule: Kill all villagers
-    if not living_villagers:
+    if teams["VILLAGER"] and not living_teams["VILLAGER"]:
         game.winner = "WOLF"
         return True
         
@@ -1,21 +1,33 @@
 import asyncio
+import math
 import random
 import uuid
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from collections import Counter
 
 from models import (
     GameState, Player, Role, Stage, GameConfig, GAME_TEMPLATES,
-    StageChangePayload, NightResultPayload, VoteResultPayload, GameOverPayload
+    StageChangePayload, NightResultPayload, VoteResultPayload, GameOverPayload,
+    NightSkillsPayload
 )
 from connections import connection_manager
+from roles import NightPlan, compile_night_plan, day_skill_for
+from bots import bot_manager, build_night_views, build_shot_views, build_vote_views
 import game_logic
+import chat
+
+# Each human speaker gets their own turn of this many seconds during SPEECH.
+SPEECH_TURN_SECONDS = 30
+# Shooters who died get this long to pick a target in DEATH_SKILL.
+DEATH_SKILL_SECONDS = 15
 
 class GameManager:
     _instance = None
     games: Dict[str, GameState] = {}
     _locks: Dict[str, asyncio.Lock] = {}
     _timers: Dict[str, asyncio.Task] = {}
+    _deadlines: Dict[str, float] = {}
+    _plans: Dict[str, NightPlan] = {}
 
     def __new__(cls):
         if cls._instance is None:
@@ -54,16 +66,47 @@ class GameManager:
             if not available_seats:
                 return None
             
-            new_player_id = f"P{random.randint(100, 999)}"
-            while any(p.id == new_player_id for p in game.players):
-                 new_player_id = f"P{random.randint(100, 999)}"
-
-            player = Player(id=new_player_id, name=player_name, seat=min(available_seats))
+            player = Player(id=self._new_player_id(game), name=player_name, seat=min(available_seats))
             game.players.append(player)
             game.players.sort(key=lambda p: p.seat)
             await self.broadcast_stage_change(room_id, 0)
             return player
 
+    def _new_player_id(self, game: GameState) -> str:
+        new_player_id = f"P{random.randint(100, 999)}"
+        while any(p.id == new_player_id for p in game.players):
+             new_player_id = f"P{random.randint(100, 999)}"
+        return new_player_id
+
+    def _ready_to_start(self, game: GameState) -> bool:
+        template = next((t for t in GAME_TEMPLATES if t.name == game.game_config.template_name), None)
+        if not template: return False
+        return len(game.players) in template.player_counts and all(p.is_ready for p in game.players)
+
+    async def fill_with_bots(self, room_id: str, requester_id: str):
+        """Fills the empty seats up to the next valid player count with ready bots. Host only."""
+        async with self._locks[room_id]:
+            game = self.get_game(room_id)
+            if not game or game.stage != Stage.WAITING or requester_id != game.host_id:
+                return
+
+            template = next((t for t in GAME_TEMPLATES if t.name == game.game_config.template_name), None)
+            if not template: return
+
+            target_count = next((c for c in sorted(template.player_counts) if c >= len(game.players)), None)
+            if target_count is None: return
+
+            occupied_seats = {p.seat for p in game.players}
+            available_seats = [i for i in range(max(template.player_counts)) if i not in occupied_seats]
+            for seat in available_seats[:target_count - len(game.players)]:
+                game.players.append(Player(id=self._new_player_id(game), name=f"机器人{seat}", seat=seat, is_bot=True, is_ready=True))
+            game.players.sort(key=lambda p: p.seat)
+            await self.broadcast_stage_change(room_id, 0)
+            should_start = self._ready_to_start(game)
+
+        if should_start:
+            await self.advance_stage(room_id, Stage.WAITING)
+
     async def set_player_ready(self, room_id: str, player_id: str, ready: bool):
         async with self._locks[room_id]:
             game = self.get_game(room_id)
@@ -75,11 +118,11 @@ class GameManager:
                 player.is_ready = ready
                 await self.broadcast_stage_change(room_id, 0)
 
-            template = next((t for t in GAME_TEMPLATES if t.name == game.game_config.template_name), None)
-            if not template: return
+            should_start = self._ready_to_start(game)
 
-            if len(game.players) in template.player_counts and all(p.is_ready for p in game.players):
-                await self.advance_stage(room_id)
+        # advance_stage takes the room lock itself, so it must run after we release it.
+        if should_start:
+            await self.advance_stage(room_id, Stage.WAITING)
 
     def _assign_roles(self, game: GameState):
         template = next((t for t in GAME_TEMPLATES if t.name == game.game_config.template_name), None)
@@ -95,15 +138,18 @@ class GameManager:
         for player, role in zip(game.players, roles):
             player.role = role
 
-    async def advance_stage(self, room_id: str):
+        self._plans[game.room_id] = compile_night_plan(template, game.players)
+
+    async def advance_stage(self, room_id: str, expected_stage: Optional[Stage] = None):
+        """Moves the room to its next stage; a no-op if the room already left `expected_stage`."""
         async with self._locks[room_id]:
             game = self.get_game(room_id)
             if not game or game.stage == Stage.GAME_OVER:
                 return
+            if expected_stage and game.stage != expected_stage:
+                return
             
-            if room_id in self._timers:
-                self._timers[room_id].cancel()
-                del self._timers[room_id]
+            self._cancel_timer(room_id)
 
             current_stage = game.stage
             next_stage = Stage.WAITING 
@@ -117,85 +163,250 @@ class GameManager:
             elif current_stage == Stage.NIGHT_START:
                 game.day += 1
                 game.night_actions = {}
+                game.day_ended = False
                 next_stage, timer = Stage.NIGHT_SKILLS, 30
             elif current_stage == Stage.NIGHT_SKILLS:
                 next_stage, timer = Stage.NIGHT_RESOLVE, 5
             elif current_stage == Stage.NIGHT_RESOLVE:
-                result = game_logic.process_night_actions(game)
+                result, checks = game_logic.process_night_actions(game, self._plans[room_id])
                 await connection_manager.broadcast(room_id, {"type": "NIGHT_RESULT", "payload": result.dict()})
-                if game_logic.check_game_over(game):
-                    next_stage = Stage.GAME_OVER
-                else:
-                    next_stage, timer = Stage.DAWN, 5
+                for checker_id, check in checks.items():
+                    bot_manager.observe_check(room_id, checker_id, check.target, check.result)
+                    await connection_manager.send_to_player(room_id, checker_id, {"type": "CHECK_RESULT", "payload": check.dict()})
+                next_stage, timer = self._after_deaths(game, Stage.DAWN)
             elif current_stage == Stage.DAWN:
                 game.speech_order = game_logic.determine_speech_order(game)
                 next_stage, timer = Stage.SPEECH_ORDER, 5
             elif current_stage == Stage.SPEECH_ORDER:
-                next_stage, timer = Stage.SPEECH, 30
+                game.speaker_index = 0
+                # Bots do not speak; with no human speakers left the stage only lingers briefly.
+                next_stage, timer = Stage.SPEECH, SPEECH_TURN_SECONDS if self._skip_bot_speakers(game) else 1
             elif current_stage == Stage.SPEECH:
-                game.day_votes = {}
-                next_stage, timer = Stage.VOTE, 30
+                if game.day_ended:
+                    # A won duel or a self-destruct skips the vote.
+                    next_stage, timer = self._after_deaths(game, Stage.NIGHT_START)
+                else:
+                    game.day_votes = {}
+                    next_stage, timer = Stage.VOTE, 30
             elif current_stage == Stage.VOTE:
                 next_stage, timer = Stage.VOTE_RESOLVE, 5
             elif current_stage == Stage.VOTE_RESOLVE:
                 result = game_logic.process_day_votes(game)
                 await connection_manager.broadcast(room_id, {"type": "VOTE_RESULT", "payload": result.dict()})
-                if game_logic.check_game_over(game):
-                    next_stage = Stage.GAME_OVER
-                else:
-                    next_stage, timer = Stage.NIGHT_START, 5
+                next_stage, timer = self._after_deaths(game, Stage.NIGHT_START)
+            elif current_stage == Stage.DEATH_SKILL:
+                # Whoever has not shot by now loses the shot.
+                game.pending_shooters = []
+                next_stage, timer = self._after_deaths(game, game.resume_stage)
 
             game.stage = next_stage
             
             if next_stage == Stage.GAME_OVER:
+                bot_manager.forget(room_id)
                 payload = GameOverPayload(winner=game.winner, roles={p.id: p.role for p in game.players})
                 await connection_manager.broadcast(room_id, {"type": "GAME_OVER", "payload": payload.dict()})
             else:
                 await self.broadcast_stage_change(room_id, timer)
-                if timer > 0:
-                    self._timers[room_id] = asyncio.create_task(self._stage_timer(room_id, next_stage, timer))
+                if timer > 0 and next_stage == Stage.SPEECH and chat.current_speaker(game):
+                    self._start_timer(room_id, timer, self._speech_turn_timer(room_id, game.speaker_index, timer))
+                elif timer > 0:
+                    self._start_timer(room_id, timer, self._stage_timer(room_id, next_stage, timer))
+                if next_stage == Stage.NIGHT_SKILLS:
+                    await self._send_night_skills(game)
+                self._schedule_bots(game, next_stage)
+
+    def _after_deaths(self, game: GameState, resume: Stage) -> Tuple[Stage, int]:
+        """Picks the stage after deaths: game over, pending shots, or `resume`."""
+        if game_logic.check_game_over(game):
+            game.pending_shooters = []
+            return Stage.GAME_OVER, 0
+        if game.pending_shooters:
+            game.resume_stage = resume
+            return Stage.DEATH_SKILL, DEATH_SKILL_SECONDS
+        return resume, 5
+
+    def _night_skills_message(self, game: GameState, player: Player) -> dict:
+        plan = self._plans[game.room_id]
+        actions = plan.available_actions(game, player)
+        blocked = [game.last_guarded] if "GUARD" in actions and game.last_guarded else []
+        payload = NightSkillsPayload(actions=actions, blocked_targets=blocked)
+        return {"type": "NIGHT_SKILLS", "payload": payload.dict()}
+
+    async def _send_night_skills(self, game: GameState):
+        """Tells each living human which night actions they can use, so clients only show those."""
+        for player in game.players:
+            if player.is_bot or not player.is_alive or not player.role:
+                continue
+            await connection_manager.send_to_player(game.room_id, player.id, self._night_skills_message(game, player))
+
+    async def send_night_skills(self, room_id: str, player_id: str):
+        """Re-sends one player's night actions, e.g. after they reconnect during NIGHT_SKILLS."""
+        async with self._locks[room_id]:
+            game = self.get_game(room_id)
+            if not game or game.stage != Stage.NIGHT_SKILLS or room_id not in self._plans:
+                return
+            player = next((p for p in game.players if p.id == player_id), None)
+            if not player or player.is_bot or not player.is_alive or not player.role:
+                return
+            await connection_manager.send_to_player(room_id, player_id, self._night_skills_message(game, player))
+
+    def _schedule_bots(self, game: GameState, stage: Stage):
+        """Lets the room's bots act; they submit through the same entry points as clients."""
+        memory = bot_manager.room_memory(game.room_id)
+        if stage == Stage.NIGHT_SKILLS:
+            views = build_night_views(game, self._plans[game.room_id], memory)
+            bot_manager.schedule(game.room_id, stage, views, self.record_player_action)
+        elif stage == Stage.VOTE:
+            views = build_vote_views(game, memory)
+            bot_manager.schedule(game.room_id, stage, views, self.record_player_vote)
+        elif stage == Stage.DEATH_SKILL:
+            views = build_shot_views(game, memory, game.pending_shooters)
+            bot_manager.schedule(game.room_id, stage, views, self._submit_shot)
+
+    async def _submit_shot(self, room_id: str, bot_id: str, target: str):
+        await self.use_day_skill(room_id, bot_id, "SHOOT", target)
+
+    def _start_timer(self, room_id: str, duration: int, coro):
+        self._deadlines[room_id] = asyncio.get_running_loop().time() + duration
+        self._timers[room_id] = asyncio.create_task(coro)
+
+    def _cancel_timer(self, room_id: str):
+        self._deadlines.pop(room_id, None)
+        # A timer firing ends up here too; it must not cancel its own task.
+        timer_task = self._timers.pop(room_id, None)
+        if timer_task and timer_task is not asyncio.current_task():
+            timer_task.cancel()
+
+    def remaining_time(self, room_id: str) -> int:
+        """Whole seconds left on the room's running timer, 0 if none is running."""
+        deadline = self._deadlines.get(room_id)
+        if deadline is None:
+            return 0
+        return max(0, math.ceil(deadline - asyncio.get_running_loop().time()))
 
     async def _stage_timer(self, room_id: str, expected_stage: Stage, duration: int):
         await asyncio.sleep(duration)
-        game = self.get_game(room_id)
-        if game and game.stage == expected_stage:
-            await self.advance_stage(room_id)
+        await self.advance_stage(room_id, expected_stage)
+
+    async def _speech_turn_timer(self, room_id: str, speaker_index: int, duration: int):
+        await asyncio.sleep(duration)
+        await self._end_speech_turn(room_id, speaker_index)
 
     async def broadcast_stage_change(self, room_id: str, timer: int):
         game = self.get_game(room_id)
         if not game: return
         
         game.timer = timer
-        payload = StageChangePayload(stage=game.stage, timer=timer, players=game.players)
+        payload = StageChangePayload(
+            stage=game.stage, timer=timer, players=game.players,
+            speech_order=game.speech_order, speaker_index=game.speaker_index,
+            pending_shooters=game.pending_shooters, used_day_skills=game.used_day_skills,
+            revealed_idiots=game.revealed_idiots,
+        )
         await connection_manager.broadcast(room_id, {"type": "STAGE_CHANGE", "payload": payload.dict()})
 
-    async def record_player_action(self, room_id: str, player_id: str, action: str, target: Optional[str]):
+    async def record_player_action(self, room_id: str, player_id: str, action: str, target: Optional[str]) -> bool:
+        """Records a night action. Returns False if the action was rejected."""
         async with self._locks[room_id]:
             game = self.get_game(room_id)
-            if not game or game.stage != Stage.NIGHT_SKILLS: return
+            if not game or game.stage != Stage.NIGHT_SKILLS: return False
 
             player = next((p for p in game.players if p.id == player_id), None)
-            if not player or not player.is_alive: return
+            if not player or not player.is_alive: return False
 
-            game.night_actions[player_id] = {"action": action, "target": target}
-            
-            if self._all_night_actions_received(game):
-                await self.advance_stage(room_id)
-
-    def _all_night_actions_received(self, game: GameState) -> bool:
-        required_actors = {
-            p.id for p in game.players if p.is_alive and p.role in [Role.WEREWOLF, Role.SEER, Role.WITCH, Role.GUARD]
-        }
-        wolves = {p.id for p in game.players if p.is_alive and p.role == Role.WEREWOLF}
-        acted_wolves = wolves.intersection(game.night_actions.keys())
-        
-        other_actors = required_actors - wolves
-        acted_others = other_actors.intersection(game.night_actions.keys())
+            plan = self._plans.get(room_id)
+            if not plan or not plan.skill_for(game, player, action, target): return False
+
+            game.night_actions.setdefault(player_id, {})[action] = target
+            should_advance = plan.all_acted(game)
 
-        all_others_acted = len(acted_others) == len(other_actors)
-        wolf_acted = len(acted_wolves) > 0 or not wolves
+        if should_advance:
+            await self.advance_stage(room_id, Stage.NIGHT_SKILLS)
+        return True
 
-        return all_others_acted and wolf_acted
+    def _skip_bot_speakers(self, game: GameState) -> bool:
+        """Moves speaker_index past bots and dead players. Returns False once everyone has spoken."""
+        players = {p.id: p for p in game.players}
+        while game.speaker_index < len(game.speech_order):
+            speaker = players.get(game.speech_order[game.speaker_index])
+            if speaker and speaker.is_alive and not speaker.is_bot:
+                return True
+            game.speaker_index += 1
+        return False
+
+    async def finish_speech(self, room_id: str, player_id: str):
+        game = self.get_game(room_id)
+        if game and game.stage == Stage.SPEECH and chat.current_speaker(game) == player_id:
+            await self._end_speech_turn(room_id, game.speaker_index)
+
+    async def _end_speech_turn(self, room_id: str, speaker_index: int):
+        """Passes the floor to the next human speaker, or ends SPEECH after the last one."""
+        async with self._locks[room_id]:
+            game = self.get_game(room_id)
+            if not game or game.stage != Stage.SPEECH or game.speaker_index != speaker_index: return
+
+            game.speaker_index += 1
+            should_advance = not self._skip_bot_speakers(game)
+            if not should_advance:
+                self._cancel_timer(room_id)
+                self._start_timer(
+                    room_id, SPEECH_TURN_SECONDS,
+                    self._speech_turn_timer(room_id, game.speaker_index, SPEECH_TURN_SECONDS),
+                )
+                await self.broadcast_stage_change(room_id, SPEECH_TURN_SECONDS)
+
+        if should_advance:
+            await self.advance_stage(room_id, Stage.SPEECH)
+
+    async def use_day_skill(self, room_id: str, player_id: str, action: str, target: Optional[str]) -> bool:
+        """
+        Uses a day skill: a shot during DEATH_SKILL (or "PASS" to give it up), or a
+        duel / self-destruct during SPEECH. Returns False if the action was rejected.
+        """
+        async with self._locks[room_id]:
+            game = self.get_game(room_id)
+            if not game: return False
+
+            player = next((p for p in game.players if p.id == player_id), None)
+            if not player: return False
+
+            stage = game.stage
+            shooters_before = set(game.pending_shooters)
+            if action == "PASS" and stage == Stage.DEATH_SKILL and player_id in game.pending_shooters:
+                game.pending_shooters.remove(player_id)
+            else:
+                skill = day_skill_for(game, player, action, target)
+                if not skill: return False
+                if stage == Stage.DEATH_SKILL:
+                    game.pending_shooters.remove(player_id)
+                else:
+                    game.used_day_skills.append(player_id)
+                result = game_logic.process_day_skill(game, player_id, action, skill, target)
+                await connection_manager.broadcast(room_id, {"type": "DAY_SKILL_RESULT", "payload": result.dict()})
+
+            speaker_index = None
+            if stage == Stage.DEATH_SKILL:
+                should_advance = not game.pending_shooters
+            else:
+                # Deaths in SPEECH end the day if the game is over or someone now has a shot to take.
+                if game.pending_shooters or game_logic.check_game_over(game):
+                    game.day_ended = True
+                should_advance = game.day_ended
+                if not should_advance and chat.current_speaker(game) in result.dead:
+                    speaker_index = game.speaker_index
+
+            if not should_advance:
+                await self.broadcast_stage_change(room_id, self.remaining_time(room_id))
+                new_shooters = [pid for pid in game.pending_shooters if pid not in shooters_before]
+                if stage == Stage.DEATH_SKILL and new_shooters:
+                    views = build_shot_views(game, bot_manager.room_memory(room_id), new_shooters)
+                    bot_manager.schedule(room_id, stage, views, self._submit_shot)
+
+        if should_advance:
+            await self.advance_stage(room_id, stage)
+        elif speaker_index is not None:
+            await self._end_speech_turn(room_id, speaker_index)
+        return True
 
     async def record_player_vote(self, room_id: str, player_id: str, target_id: str):
         async with self._locks[room_id]:
@@ -205,11 +416,14 @@ class GameManager:
             voter = next((p for p in game.players if p.id == player_id), None)
             target = next((p for p in game.players if p.id == target_id), None)
 
-            if voter and voter.is_alive and target and target.is_alive:
+            # A revealed Idiot stays in the game but has lost the vote.
+            if voter and voter.is_alive and voter.id not in game.revealed_idiots and target and target.is_alive:
                 game.day_votes[player_id] = target_id
 
-            living_players_count = len([p for p in game.players if p.is_alive])
-            if len(game.day_votes) == living_players_count:
-                await self.advance_stage(room_id)
+            voters_count = len([p for p in game.players if p.is_alive and p.id not in game.revealed_idiots])
+            should_advance = len(game.day_votes) == voters_count
+
+        if should_advance:
+            await self.advance_stage(room_id, Stage.VOTE)
 
 game_manager = GameManager()
@@ -1,16 +1,15 @@
-import asyncio
 import json
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Any, Dict
 
 from models import (
-    GameState, GameConfig, RoomCreateRequest, RoomCreateResponse, 
-    RoomJoinRequest, RoomJoinResponse, ReadyPayload, ActionPayload, 
-    VotePayload, SpeechDonePayload, ConnectedPayload, GAME_TEMPLATES
+    GameState, RoomCreateRequest, RoomCreateResponse,
+    RoomJoinRequest, RoomJoinResponse, ConnectedPayload, GAME_TEMPLATES
 )
 from game_manager import game_manager
 from connections import connection_manager
+from chat import chat_relay
 
 app = FastAPI()
 
@@ -80,7 +79,7 @@ async def parse_ws_message(ws: WebSocket, data: Any) -> Dict[str, Any]:
             await ws.send_text("Invalid JSON format.")
             return None
     
-    if not isinstance(data, dict) or "type" not in data or "payload" not in data:
+    if not isinstance(data, dict) or "type" not in data or not isinstance(data.get("payload"), dict):
         await ws.send_text("Invalid message structure.")
         return None
     return data
@@ -105,7 +104,10 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
     connected_payload = ConnectedPayload(player_id=player_id, room_id=room_id)
     await websocket.send_json({"type": "CONNECTED", "payload": connected_payload.dict()})
     
-    await game_manager.broadcast_stage_change(room_id, game.timer)
+    await game_manager.broadcast_stage_change(room_id, game_manager.remaining_time(room_id))
+    await websocket.send_json({"type": "CHAT_HISTORY", "payload": {"messages": chat_relay.history(room_id)}})
+    # A player who reloads mid-night would otherwise have no controls until the next night.
+    await game_manager.send_night_skills(room_id, player_id)
 
     try:
         while True:
@@ -119,12 +121,29 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
             if msg_type == "READY":
                 await game_manager.set_player_ready(room_id, player_id, payload.get("ready", False))
             elif msg_type == "ACTION":
-                await game_manager.record_player_action(room_id, player_id, payload.get("action"), payload.get("target"))
+                accepted = await game_manager.record_player_action(room_id, player_id, payload.get("action"), payload.get("target"))
+                if not accepted:
+                    await websocket.send_json({"type": "ACTION_REJECTED", "payload": {"action": payload.get("action")}})
+            elif msg_type == "DAY_SKILL":
+                accepted = await game_manager.use_day_skill(room_id, player_id, payload.get("action"), payload.get("target"))
+                if not accepted:
+                    await websocket.send_json({"type": "ACTION_REJECTED", "payload": {"action": payload.get("action")}})
             elif msg_type == "VOTE":
                 await game_manager.record_player_vote(room_id, player_id, payload.get("target"))
+            elif msg_type == "FILL_BOTS":
+                await game_manager.fill_with_bots(room_id, player_id)
+            elif msg_type == "CHAT":
+                error = chat_relay.post(game, player_id, payload.get("text"))
+                if error:
+                    await websocket.send_json({"type": "CHAT_REJECTED", "payload": {"reason": error}})
+            elif msg_type == "SPEECH_DONE":
+                await game_manager.finish_speech(room_id, player_id)
 
     except WebSocketDisconnect:
-        connection_manager.disconnect(room_id, player_id)
+        pass
+    finally:
+        # Also runs if a handler raises, so a bad message never leaves a dead socket registered.
+        connection_manager.disconnect(room_id, player_id, websocket)
 
 @app.get("/health")
 async def health_check():
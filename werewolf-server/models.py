@@ -34,6 +34,7 @@ class Stage(str, Enum):
     SPEECH = "SPEECH"
     VOTE = "VOTE"
     VOTE_RESOLVE = "VOTE_RESOLVE"
+    DEATH_SKILL = "DEATH_SKILL"  # hunters and wolf kings who just died pick a target
     GAME_OVER = "GAME_OVER"
 
 # 3. 玩家与房间 (Player & Room)
@@ -46,6 +47,7 @@ class Player(BaseModel):
     role: Optional[Role] = None
     is_host: bool = False
     is_ready: bool = False
+    is_bot: bool = False
     seat: Optional[int] = Field(default=None, ge=0, lt=12)
 
 class GameConfig(BaseModel):
@@ -64,10 +66,19 @@ class GameState(BaseModel):
     host_id: str
     game_config: GameConfig
     speech_order: List[str] = []
+    speaker_index: int = 0
     night_actions: Dict[str, Any] = {}
     day_votes: Dict[str, str] = {}
     witch_has_save: bool = True
     witch_has_poison: bool = True
+    last_guarded: Optional[str] = None
+    charmed: Optional[str] = None
+    evil_knight_has_reflect: bool = True
+    pending_shooters: List[str] = []
+    resume_stage: Optional[Stage] = None
+    used_day_skills: List[str] = []
+    revealed_idiots: List[str] = []
+    day_ended: bool = False
     winner: Optional[Literal["GOOD", "WOLF"]] = None
 
 # 4. WebSocket 事件模型 (WebSocket Event Models)
@@ -79,16 +90,36 @@ class StageChangePayload(BaseModel):
     stage: Stage
     timer: int
     players: List[Player]
+    speech_order: List[str] = []
+    speaker_index: int = 0
+    pending_shooters: List[str] = []
+    used_day_skills: List[str] = []
+    revealed_idiots: List[str] = []
 
 class NightResultPayload(BaseModel):
     dead: List[str]
     saved: Optional[str] = None
     poisoned: Optional[str] = None
-    checked: Optional[Dict[str, Role]] = None
+
+class NightSkillsPayload(BaseModel):
+    actions: List[str]
+    blocked_targets: List[str] = []
+
+class CheckResultPayload(BaseModel):
+    target: str
+    result: str
 
 class VoteResultPayload(BaseModel):
     eliminated: Optional[str]
     votes: Dict[str, str]
+    linked_dead: List[str] = []
+    revealed: Optional[str] = None
+
+class DaySkillPayload(BaseModel):
+    actor: str
+    action: str
+    target: Optional[str] = None
+    dead: List[str] = []
 
 class GameOverPayload(BaseModel):
     winner: Literal["GOOD", "WOLF"]
@@ -121,6 +152,18 @@ GAME_TEMPLATES: List[GameTemplate] = [
         roles={Role.WEREWOLF: 3, Role.WOLF_KING: 1, Role.VILLAGER: 4, Role.SEER: 1, Role.WITCH: 1, Role.HUNTER: 1, Role.GUARD: 1},
         description="3狼, 狼王, 4民, 预女猎守"
     ),
+    GameTemplate(
+        name="狼美人骑士",
+        player_counts=[12],
+        roles={Role.WEREWOLF: 2, Role.WOLF_BEAUTY: 1, Role.WHITE_WOLF_KING: 1, Role.VILLAGER: 4, Role.SEER: 1, Role.WITCH: 1, Role.GUARD: 1, Role.KNIGHT: 1},
+        description="2狼, 狼美人, 白狼王, 4民, 预女守骑"
+    ),
+    GameTemplate(
+        name="石像鬼恶灵骑士",
+        player_counts=[12],
+        roles={Role.SNOW_WOLF: 1, Role.EVIL_KNIGHT: 1, Role.GARGOYLE: 1, Role.HIDDEN_WOLF: 1, Role.VILLAGER: 4, Role.SEER: 1, Role.WITCH: 1, Role.HUNTER: 1, Role.GUARD: 1},
+        description="雪狼, 恶灵骑士, 石像鬼, 隐狼, 4民, 预女猎守"
+    ),
 ]
 
 # 6. REST API Models
@@ -0,0 +1,392 @@
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from models import GameState, GameTemplate, Player, Role, Stage
+
+# 1. 技能注册表 (Skill Registry)
+# A night skill resolves every submission of one action in a single call.
+# Submissions arrive as (actor_id, target_id) pairs.
+Submissions = List[Tuple[str, Optional[str]]]
+NightSkillHandler = Callable[["NightContext", Submissions], None]
+
+NIGHT_SKILLS: Dict[str, NightSkillHandler] = {}
+# Skills whose actor may not pick themselves as the target.
+NO_SELF_TARGET: Set[str] = set()
+
+def night_skill(name: str, self_target: bool = True):
+    """Registers a night skill resolver under `name`."""
+    def decorator(handler: NightSkillHandler) -> NightSkillHandler:
+        NIGHT_SKILLS[name] = handler
+        if not self_target:
+            NO_SELF_TARGET.add(name)
+        return handler
+    return decorator
+
+# A day skill resolves one use on the spot. It runs only in its registered
+# stage: SPEECH for active skills, DEATH_SKILL for shots taken on death.
+class DaySkillOutcome:
+    __slots__ = ("dead", "ends_day")
+
+    def __init__(self, dead: List[str], ends_day: bool = False):
+        self.dead = dead
+        self.ends_day = ends_day
+
+DaySkillHandler = Callable[[GameState, str, str], DaySkillOutcome]
+
+DAY_SKILLS: Dict[str, DaySkillHandler] = {}
+DAY_SKILL_STAGES: Dict[str, Stage] = {}
+
+def day_skill(name: str, stage: Stage):
+    """Registers a day skill resolver under `name`, usable during `stage`."""
+    def decorator(handler: DaySkillHandler) -> DaySkillHandler:
+        DAY_SKILLS[name] = handler
+        DAY_SKILL_STAGES[name] = stage
+        return handler
+    return decorator
+
+# 2. 角色注册表 (Role Registry)
+class RoleSpec:
+    """
+    Static description of a role.
+    - `faction`: the side that wins with this role ("GOOD" or "WOLF").
+    - `team`: "GOD", "VILLAGER" or "WOLF"; used by the win conditions.
+    - `night_skills`: client action name -> registered night skill.
+    - `day_skills`: client action name -> registered day skill.
+    - `priority`: wake order; lower priorities resolve first.
+    - `seen_as`: the faction the seer sees when checking this role.
+    - `night_immune`: cannot die at night (by knife or poison).
+    - `inherits_kill`: may only KILL once all other wolves are dead.
+    - `required_skill`: a night skill this role must submit before the night can end early.
+    - `reveals_on_vote`: survives the first vote against them, but may not vote afterwards.
+    """
+    __slots__ = (
+        "role", "faction", "team", "night_skills", "day_skills", "priority",
+        "seen_as", "night_immune", "inherits_kill", "required_skill", "reveals_on_vote",
+    )
+
+    def __init__(
+        self,
+        role: Role,
+        faction: str,
+        team: str,
+        night_skills: Optional[Dict[str, str]] = None,
+        priority: int = 0,
+        seen_as: Optional[str] = None,
+        night_immune: bool = False,
+        inherits_kill: bool = False,
+        required_skill: Optional[str] = None,
+        day_skills: Optional[Dict[str, str]] = None,
+        reveals_on_vote: bool = False,
+    ):
+        self.role = role
+        self.faction = faction
+        self.team = team
+        self.night_skills = night_skills or {}
+        self.day_skills = day_skills or {}
+        self.priority = priority
+        self.seen_as = seen_as or faction
+        self.night_immune = night_immune
+        self.inherits_kill = inherits_kill
+        self.required_skill = required_skill
+        self.reveals_on_vote = reveals_on_vote
+
+ROLE_REGISTRY: Dict[Role, RoleSpec] = {}
+
+def register_role(spec: RoleSpec) -> RoleSpec:
+    ROLE_REGISTRY[spec.role] = spec
+    return spec
+
+def get_role_spec(role: Role) -> RoleSpec:
+    return ROLE_REGISTRY[role]
+
+# 3. 夜晚结算上下文 (Night Context)
+class NightContext:
+    """Mutable scratch state shared by the night skills of a single night."""
+    __slots__ = (
+        "game", "roles", "bots", "kill_target", "guarded", "saved",
+        "poisoned", "reflected", "checks",
+    )
+
+    def __init__(self, game: GameState, roles: Dict[str, Role], bots: Set[str] = frozenset()):
+        self.game = game
+        self.roles = roles
+        self.bots = bots
+        self.kill_target: Optional[str] = None
+        self.guarded: Optional[str] = None
+        self.saved: Optional[str] = None
+        self.poisoned: Optional[str] = None
+        self.reflected: List[str] = []
+        self.checks: Dict[str, Tuple[str, str]] = {}
+
+    def spec_of(self, player_id: str) -> Optional[RoleSpec]:
+        role = self.roles.get(player_id)
+        return ROLE_REGISTRY[role] if role else None
+
+    def try_reflect(self, actor_id: str, target_id: str) -> bool:
+        """Evil Knight: the first god to target him with a skill dies instead."""
+        game = self.game
+        if self.roles.get(target_id) == Role.EVIL_KNIGHT and game.evil_knight_has_reflect:
+            game.evil_knight_has_reflect = False
+            self.reflected.append(actor_id)
+            return True
+        return False
+
+# 4. 技能实现 (Skill Implementations)
+@night_skill("GUARD")
+def _resolve_guard(ctx: NightContext, submissions: Submissions):
+    for _, target in submissions:
+        # The same player cannot be guarded on two consecutive nights.
+        if target and target != ctx.game.last_guarded:
+            ctx.guarded = target
+
+@night_skill("WOLF_KILL")
+def _resolve_wolf_kill(ctx: NightContext, submissions: Submissions):
+    # Bots only fill in for the pack: once a human wolf has voted, the humans decide.
+    human_votes = [target for actor, target in submissions if target and actor not in ctx.bots]
+    votes = human_votes or [target for _, target in submissions if target]
+    if votes:
+        ctx.kill_target = Counter(votes).most_common(1)[0][0]
+
+@night_skill("CHARM", self_target=False)
+def _resolve_charm(ctx: NightContext, submissions: Submissions):
+    for _, target in submissions:
+        if target:
+            ctx.game.charmed = target
+
+@night_skill("SAVE")
+def _resolve_save(ctx: NightContext, submissions: Submissions):
+    game = ctx.game
+    if submissions and ctx.kill_target and game.witch_has_save:
+        ctx.saved = ctx.kill_target
+        game.witch_has_save = False
+
+@night_skill("POISON", self_target=False)
+def _resolve_poison(ctx: NightContext, submissions: Submissions):
+    game = ctx.game
+    # The witch cannot use both potions on the same night.
+    if ctx.saved or not game.witch_has_poison:
+        return
+    for actor, target in submissions:
+        if not target:
+            continue
+        game.witch_has_poison = False
+        if not ctx.try_reflect(actor, target):
+            ctx.poisoned = target
+        return
+
+@night_skill("PASS")
+def _resolve_pass(ctx: NightContext, submissions: Submissions):
+    # Ends the player's turn without acting, so the night need not wait for them.
+    pass
+
+@night_skill("SEER_CHECK", self_target=False)
+def _resolve_seer_check(ctx: NightContext, submissions: Submissions):
+    for actor, target in submissions:
+        spec = ctx.spec_of(target) if target else None
+        if spec:
+            ctx.checks[actor] = (target, spec.seen_as)
+            ctx.try_reflect(actor, target)
+
+@night_skill("GARGOYLE_CHECK", self_target=False)
+def _resolve_gargoyle_check(ctx: NightContext, submissions: Submissions):
+    for actor, target in submissions:
+        role = ctx.roles.get(target) if target else None
+        if role:
+            ctx.checks[actor] = (target, role.value)
+
+@day_skill("SHOOT", Stage.DEATH_SKILL)
+def _resolve_shoot(game: GameState, actor_id: str, target_id: str) -> DaySkillOutcome:
+    return DaySkillOutcome([target_id])
+
+@day_skill("KNIGHT_DUEL", Stage.SPEECH)
+def _resolve_knight_duel(game: GameState, actor_id: str, target_id: str) -> DaySkillOutcome:
+    # A wolf loses the duel and the day ends at once; otherwise the knight dies.
+    target = next(p for p in game.players if p.id == target_id)
+    if ROLE_REGISTRY[target.role].faction == "WOLF":
+        return DaySkillOutcome([target_id], ends_day=True)
+    return DaySkillOutcome([actor_id])
+
+@day_skill("WHITE_WOLF_KING_BLAST", Stage.SPEECH)
+def _resolve_white_wolf_king_blast(game: GameState, actor_id: str, target_id: str) -> DaySkillOutcome:
+    return DaySkillOutcome([actor_id, target_id], ends_day=True)
+
+def day_skill_for(game: GameState, player: Player, action: str, target: Optional[str]) -> Optional[str]:
+    """
+    Returns the day skill `action` maps to for this player right now, or None if
+    they cannot use it. Shots belong to the pending shooters of DEATH_SKILL;
+    SPEECH skills can be used once per game by a living player. The target must
+    be another living player.
+    """
+    skill = ROLE_REGISTRY[player.role].day_skills.get(action) if player.role else None
+    if not skill or game.stage != DAY_SKILL_STAGES[skill]:
+        return None
+    if game.stage == Stage.DEATH_SKILL:
+        if player.id not in game.pending_shooters:
+            return None
+    elif not player.is_alive or player.id in game.used_day_skills:
+        return None
+    if target == player.id or not any(p.id == target and p.is_alive for p in game.players):
+        return None
+    return skill
+
+def shoots_on_death(role: Optional[Role]) -> bool:
+    return bool(role) and any(
+        DAY_SKILL_STAGES[skill] == Stage.DEATH_SKILL for skill in ROLE_REGISTRY[role].day_skills.values()
+    )
+
+# 5. 角色定义 (Role Definitions)
+_WOLF_KILL = {"KILL": "WOLF_KILL"}
+
+register_role(RoleSpec(Role.VILLAGER, "GOOD", "VILLAGER"))
+register_role(RoleSpec(Role.HUNTER, "GOOD", "GOD", day_skills={"SHOOT": "SHOOT"}))
+register_role(RoleSpec(Role.IDIOT, "GOOD", "GOD", reveals_on_vote=True))
+register_role(RoleSpec(Role.KNIGHT, "GOOD", "GOD", day_skills={"DUEL": "KNIGHT_DUEL"}))
+register_role(RoleSpec(Role.GUARD, "GOOD", "GOD", {"GUARD": "GUARD"}, priority=10, required_skill="GUARD"))
+register_role(RoleSpec(Role.WEREWOLF, "WOLF", "WOLF", _WOLF_KILL, priority=20))
+register_role(RoleSpec(Role.WOLF_KING, "WOLF", "WOLF", _WOLF_KILL, priority=20, day_skills={"SHOOT": "SHOOT"}))
+register_role(RoleSpec(
+    Role.WHITE_WOLF_KING, "WOLF", "WOLF", _WOLF_KILL,
+    priority=20, day_skills={"SELF_DESTRUCT": "WHITE_WOLF_KING_BLAST"},
+))
+register_role(RoleSpec(Role.SNOW_WOLF, "WOLF", "WOLF", _WOLF_KILL, priority=20, seen_as="GOOD"))
+register_role(RoleSpec(Role.EVIL_KNIGHT, "WOLF", "WOLF", _WOLF_KILL, priority=20, night_immune=True))
+register_role(RoleSpec(
+    Role.WOLF_BEAUTY, "WOLF", "WOLF", {"KILL": "WOLF_KILL", "CHARM": "CHARM"},
+    priority=25, required_skill="CHARM",
+))
+register_role(RoleSpec(Role.HIDDEN_WOLF, "WOLF", "WOLF", _WOLF_KILL, priority=20, seen_as="GOOD", inherits_kill=True))
+register_role(RoleSpec(
+    Role.GARGOYLE, "WOLF", "WOLF", {"CHECK": "GARGOYLE_CHECK", "KILL": "WOLF_KILL"},
+    priority=40, inherits_kill=True, required_skill="GARGOYLE_CHECK",
+))
+register_role(RoleSpec(Role.WITCH, "GOOD", "GOD", {"SAVE": "SAVE", "POISON": "POISON", "PASS": "PASS"}, priority=30))
+register_role(RoleSpec(Role.SEER, "GOOD", "GOD", {"CHECK": "SEER_CHECK"}, priority=40, required_skill="SEER_CHECK"))
+
+# 6. 结算计划 (Night Resolution Plan)
+class NightPlan:
+    """
+    A game template compiled into an ordered list of night skills, bound to
+    one room's role assignment. Built once when the room starts so that each
+    night resolves in a single pass over the submitted actions.
+    """
+
+    def __init__(self, template: GameTemplate, players: List[Player]):
+        specs = [ROLE_REGISTRY[role] for role in template.roles]
+
+        # Each skill runs at the lowest priority of any role that uses it.
+        skill_priority: Dict[str, int] = {}
+        for spec in specs:
+            for skill in spec.night_skills.values():
+                skill_priority[skill] = min(skill_priority.get(skill, spec.priority), spec.priority)
+        self.steps: List[Tuple[str, NightSkillHandler]] = [
+            (skill, NIGHT_SKILLS[skill])
+            for skill in sorted(skill_priority, key=lambda s: skill_priority[s])
+        ]
+        self.has_guard = "GUARD" in skill_priority
+
+        # Dispatch table: (role, action) -> skill.
+        self.dispatch: Dict[Tuple[Role, str], str] = {
+            (spec.role, action): skill
+            for spec in specs
+            for action, skill in spec.night_skills.items()
+        }
+
+        self.roles: Dict[str, Role] = {p.id: p.role for p in players if p.role}
+        self.bots = {p.id for p in players if p.is_bot}
+        self.native_killers = {
+            pid for pid, role in self.roles.items()
+            if (role, "KILL") in self.dispatch and not ROLE_REGISTRY[role].inherits_kill
+        }
+        self.inheritors = {pid for pid, role in self.roles.items() if ROLE_REGISTRY[role].inherits_kill}
+        self.witches = {pid for pid, role in self.roles.items() if role == Role.WITCH}
+        self.required = {
+            pid: ROLE_REGISTRY[role].required_skill
+            for pid, role in self.roles.items()
+            if ROLE_REGISTRY[role].required_skill
+        }
+
+    def _alive(self, game: GameState) -> Dict[str, Player]:
+        return {p.id: p for p in game.players if p.is_alive}
+
+    def _killers(self, alive: Dict[str, Player]) -> set:
+        native = self.native_killers.intersection(alive)
+        return native if native else self.inheritors.intersection(alive)
+
+    def skill_for(self, game: GameState, player: Player, action: str, target: Optional[str] = None) -> Optional[str]:
+        """
+        Returns the skill `action` maps to for this player tonight, or None if it
+        would have no effect. A given `target` must be a living player, and not
+        the actor for skills registered with `self_target=False`.
+        """
+        skill = self.dispatch.get((player.role, action))
+        if not skill:
+            return None
+        alive = self._alive(game)
+        if target is not None:
+            if target not in alive:
+                return None
+            if target == player.id and skill in NO_SELF_TARGET:
+                return None
+        if skill == "WOLF_KILL" and player.id not in self._killers(alive):
+            return None
+        if skill == "GUARD" and target is not None and target == game.last_guarded:
+            return None
+        if skill == "SAVE" and not game.witch_has_save:
+            return None
+        if skill == "POISON" and not game.witch_has_poison:
+            return None
+        if skill == "PASS" and not any(
+            other != skill and self.skill_for(game, player, action)
+            for action, other in ROLE_REGISTRY[player.role].night_skills.items()
+        ):
+            return None
+        return skill
+
+    def available_actions(self, game: GameState, player: Player) -> List[str]:
+        return [action for action in ROLE_REGISTRY[player.role].night_skills if self.skill_for(game, player, action)]
+
+    def all_acted(self, game: GameState) -> bool:
+        alive = self._alive(game)
+        actions = game.night_actions
+
+        for pid, skill in self.required.items():
+            if pid in alive and not any(
+                self.dispatch.get((self.roles[pid], action)) == skill for action in actions.get(pid, ())
+            ):
+                return False
+
+        if game.witch_has_save or game.witch_has_poison:
+            if any(pid in alive and pid not in actions for pid in self.witches):
+                return False
+
+        # Every human killer must vote; a pack of only bots needs a single KILL.
+        killers = self._killers(alive)
+        human_killers = killers - self.bots
+        if human_killers:
+            return all("KILL" in actions.get(pid, ()) for pid in human_killers)
+        if killers and not any("KILL" in actions.get(pid, ()) for pid in killers):
+            return False
+        return True
+
+    def resolve(self, game: GameState) -> NightContext:
+        ctx = NightContext(game, self.roles, self.bots)
+
+        buckets: Dict[str, Submissions] = {}
+        for actor_id, submitted in game.night_actions.items():
+            role = self.roles.get(actor_id)
+            for action, target in submitted.items():
+                skill = self.dispatch.get((role, action))
+                if skill:
+                    buckets.setdefault(skill, []).append((actor_id, target))
+
+        for skill, handler in self.steps:
+            submissions = buckets.get(skill)
+            if submissions:
+                handler(ctx, submissions)
+
+        if self.has_guard:
+            game.last_guarded = ctx.guarded
+        return ctx
+
+def compile_night_plan(template: GameTemplate, players: List[Player]) -> NightPlan:
+    return NightPlan(template, players)
@@ -0,0 +1,22 @@
+import os
+import sys
+from typing import Dict, List
+
+# The server modules import each other as top-level modules (`from models import ...`).
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import GameConfig, GameState, GameTemplate, Player, Role  # noqa: E402
+
+def make_game(roles: List[Role], bots: List[int] = ()) -> GameState:
+    """Builds a started game with players P0..Pn seated in order and holding `roles`."""
+    players = [
+        Player(id=f"P{i}", name=str(i), seat=i, role=role, is_bot=i in bots)
+        for i, role in enumerate(roles)
+    ]
+    return GameState(room_id="R1", host_id="P0", players=players, game_config=GameConfig(template_name="test"))
+
+def make_template(roles: List[Role]) -> GameTemplate:
+    counts: Dict[Role, int] = {}
+    for role in roles:
+        counts[role] = counts.get(role, 0) + 1
+    return GameTemplate(name="test", player_counts=[len(roles)], roles=counts, description="")
@@ -0,0 +1,143 @@
+import asyncio
+
+from conftest import make_game, make_template
+from models import GAME_TEMPLATES, GameConfig, Role, Stage
+from roles import compile_night_plan
+import bots
+from bots import BotManager, build_night_views, decide_night, fallback_night, fallback_target
+from connections import connection_manager
+from game_manager import game_manager
+
+SIX_PLAYER_ROLES = [Role.WEREWOLF, Role.WEREWOLF, Role.SEER, Role.GUARD, Role.VILLAGER, Role.VILLAGER]
+
+def test_night_waits_for_human_wolf():
+    game = make_game(SIX_PLAYER_ROLES, bots=[1, 2, 3, 4, 5])
+    plan = compile_night_plan(make_template(SIX_PLAYER_ROLES), game.players)
+    game.night_actions = {"P1": {"KILL": "P4"}, "P2": {"CHECK": "P1"}, "P3": {"GUARD": "P5"}}
+
+    assert not plan.all_acted(game)
+
+    game.night_actions["P0"] = {"KILL": "P5"}
+    assert plan.all_acted(game)
+
+def test_all_bot_pack_needs_one_kill():
+    game = make_game(SIX_PLAYER_ROLES, bots=[0, 1, 2, 3, 4, 5])
+    plan = compile_night_plan(make_template(SIX_PLAYER_ROLES), game.players)
+    game.night_actions = {"P0": {"KILL": "P4"}, "P2": {"CHECK": "P1"}, "P3": {"GUARD": "P5"}}
+
+    assert plan.all_acted(game)
+
+def test_human_wolf_vote_overrides_bot_wolves():
+    roles = [Role.WEREWOLF, Role.WEREWOLF, Role.WEREWOLF, Role.SEER, Role.VILLAGER, Role.VILLAGER]
+    game = make_game(roles, bots=[1, 2, 3, 4, 5])
+    plan = compile_night_plan(make_template(roles), game.players)
+    game.night_actions = {"P0": {"KILL": "P5"}, "P1": {"KILL": "P4"}, "P2": {"KILL": "P4"}}
+
+    assert plan.resolve(game).kill_target == "P5"
+
+def test_bot_wolves_share_a_target():
+    roles = [Role.WEREWOLF, Role.WEREWOLF, Role.WEREWOLF, Role.SEER, Role.VILLAGER, Role.VILLAGER]
+    game = make_game(roles, bots=[0, 1, 2, 3, 4, 5])
+    plan = compile_night_plan(make_template(roles), game.players)
+
+    views = [view for view in build_night_views(game, plan, {}) if "KILL" in view.actions]
+    targets = {decide_night(view)["KILL"] for view in views}
+
+    assert len(views) == 3
+    assert len(targets) == 1
+    assert targets.pop() not in {"P0", "P1", "P2"}
+
+def test_bot_filled_room_waits_for_human_wolf():
+    async def scenario():
+        template = next(t for t in GAME_TEMPLATES if t.name == "6人暗牌局")
+        game = await game_manager.create_game("host", GameConfig(template_name=template.name))
+        await game_manager.fill_with_bots(game.room_id, game.host_id)
+        for player, role in zip(game.players, SIX_PLAYER_ROLES):
+            player.role = role
+        game_manager._plans[game.room_id] = compile_night_plan(template, game.players)
+        game.stage = Stage.NIGHT_START
+
+        await game_manager.advance_stage(game.room_id, Stage.NIGHT_START)
+        await asyncio.sleep(0.3)
+        assert game.stage == Stage.NIGHT_SKILLS
+        assert game.host_id not in game.night_actions
+
+        target = next(p.id for p in game.players if p.role == Role.VILLAGER)
+        assert await game_manager.record_player_action(game.room_id, game.host_id, "KILL", target)
+        assert game.stage == Stage.NIGHT_RESOLVE
+        assert game_manager._plans[game.room_id].resolve(game).kill_target == target
+
+    asyncio.run(scenario())
+
+class JsonSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def send_json(self, message: dict):
+        self.messages.append(message)
+
+def test_reconnecting_player_gets_night_skills_again():
+    async def scenario():
+        template = next(t for t in GAME_TEMPLATES if t.name == "6人暗牌局")
+        game = await game_manager.create_game("host", GameConfig(template_name=template.name))
+        await game_manager.fill_with_bots(game.room_id, game.host_id)
+        for player, role in zip(game.players, SIX_PLAYER_ROLES):
+            player.role = role
+        game_manager._plans[game.room_id] = compile_night_plan(template, game.players)
+        game.stage = Stage.NIGHT_START
+        await game_manager.advance_stage(game.room_id, Stage.NIGHT_START)
+
+        socket = JsonSocket()
+        connection_manager.active_connections.setdefault(game.room_id, {})[game.host_id] = socket
+        await game_manager.send_night_skills(game.room_id, game.host_id)
+
+        assert socket.messages == [{"type": "NIGHT_SKILLS", "payload": {"actions": ["KILL"], "blocked_targets": []}}]
+        connection_manager.disconnect(game.room_id, game.host_id)
+        game_manager._cancel_timer(game.room_id)
+
+    asyncio.run(scenario())
+
+def test_fallback_targets_are_valid_for_the_action():
+    game = make_game(SIX_PLAYER_ROLES, bots=[0, 1, 2, 3, 4, 5])
+    game.last_guarded = "P5"
+    plan = compile_night_plan(make_template(SIX_PLAYER_ROLES), game.players)
+    views = {view.bot_id: view for view in build_night_views(game, plan, {})}
+
+    for _ in range(20):
+        for bot_id, view in views.items():
+            player = next(p for p in game.players if p.id == bot_id)
+            for action, target in fallback_night(view).items():
+                assert plan.skill_for(game, player, action, target), (bot_id, action, target)
+        assert fallback_target(views["P0"], "KILL") not in {"P0", "P1"}
+
+def test_failing_strategy_still_acts_and_rejected_moves_are_retried(monkeypatch):
+    def broken(view):
+        raise RuntimeError("strategy bug")
+    monkeypatch.setattr(bots, "decide_night", broken)
+
+    async def scenario():
+        game = make_game(SIX_PLAYER_ROLES, bots=[0, 1, 2, 3, 4, 5])
+        plan = compile_night_plan(make_template(SIX_PLAYER_ROLES), game.players)
+        manager = BotManager()
+        attempts, invalid = [], []
+
+        async def submit(room_id, bot_id, action, target):
+            attempts.append(bot_id)
+            # Reject every bot's first try, as if its target had just become invalid.
+            if attempts.count(bot_id) == 1:
+                return False
+            player = next(p for p in game.players if p.id == bot_id)
+            if not plan.skill_for(game, player, action, target):
+                invalid.append((bot_id, action, target))
+            game.night_actions.setdefault(bot_id, {})[action] = target
+            return True
+
+        manager.schedule(game.room_id, Stage.NIGHT_SKILLS, build_night_views(game, plan, {}), submit)
+        assert len(manager._tasks[game.room_id]) == 4
+        await asyncio.sleep(0.3)
+
+        assert not manager._tasks[game.room_id]
+        assert invalid == []
+        assert plan.all_acted(game)
+
+    asyncio.run(scenario())
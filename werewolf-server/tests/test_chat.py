@@ -0,0 +1,147 @@
+import asyncio
+
+from conftest import make_game
+from models import Role, Stage
+from connections import ConnectionManager
+import chat
+from chat import CHAT_BURST, CHAT_FLUSH_INTERVAL, ChatRelay
+
+class RecordingSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.frames = []
+        self.close_code = None
+
+    async def send_text(self, message: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.frames.append(message)
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+class BrokenSocket(RecordingSocket):
+    async def send_text(self, message: str):
+        raise RuntimeError("connection reset")
+
+def make_room(relay: ChatRelay, room_id: str, sockets: dict):
+    game = make_game([Role.WEREWOLF, Role.SEER, Role.VILLAGER])
+    game.room_id = room_id
+    game.stage = Stage.SPEECH
+    game.speech_order = ["P0", "P1", "P2"]
+    relay.connections.active_connections[room_id] = sockets
+    return game
+
+def test_only_current_speaker_may_post():
+    async def scenario():
+        relay = ChatRelay(ConnectionManager())
+        game = make_room(relay, "R1", {})
+
+        assert relay.post(game, "P0", "hello") is None
+        assert relay.post(game, "P1", "hello") == "It is not your turn to speak."
+
+        game.speaker_index = 1
+        assert relay.post(game, "P1", "hello") is None
+
+        game.stage = Stage.NIGHT_SKILLS
+        assert relay.post(game, "P1", "hello") == "Chat is closed at this stage."
+
+    asyncio.run(scenario())
+
+def test_non_string_text_is_rejected():
+    async def scenario():
+        relay = ChatRelay(ConnectionManager())
+        game = make_room(relay, "R1", {})
+
+        for text in (None, 42, ["hi"], {"text": "hi"}):
+            assert relay.post(game, "P0", text) == "Message must be a string."
+        assert relay.post(game, "P0", "   ") == "Empty message."
+        assert relay.history("R1") == []
+
+    asyncio.run(scenario())
+
+def test_token_bucket_limits_bursts():
+    async def scenario():
+        relay = ChatRelay(ConnectionManager())
+        game = make_room(relay, "R1", {})
+
+        results = [relay.post(game, "P0", f"m{i}") for i in range(CHAT_BURST + 1)]
+
+        assert results[:CHAT_BURST] == [None] * CHAT_BURST
+        assert results[-1] == "You are sending messages too fast."
+        assert len(relay.history("R1")) == CHAT_BURST
+
+    asyncio.run(scenario())
+
+def test_messages_in_one_window_share_a_frame():
+    async def scenario():
+        relay = ChatRelay(ConnectionManager())
+        socket = RecordingSocket()
+        game = make_room(relay, "R1", {"P0": socket})
+
+        relay.post(game, "P0", "a")
+        relay.post(game, "P0", "b")
+        await asyncio.sleep(CHAT_FLUSH_INTERVAL * 3)
+
+        assert len(socket.frames) == 1
+        assert '"a"' in socket.frames[0] and '"b"' in socket.frames[0]
+
+    asyncio.run(scenario())
+
+def test_broken_socket_is_dropped_and_others_still_receive():
+    async def scenario():
+        relay = ChatRelay(ConnectionManager())
+        broken = BrokenSocket()
+        good = RecordingSocket()
+        game = make_room(relay, "R1", {"P0": broken, "P1": good})
+
+        relay.post(game, "P0", "first")
+        await asyncio.sleep(CHAT_FLUSH_INTERVAL * 3)
+
+        assert len(good.frames) == 1
+        assert "P0" not in relay.connections.active_connections["R1"]
+        # Closed so the client reconnects rather than silently missing updates.
+        assert broken.close_code == 1011
+        assert good.close_code is None
+
+        # The flusher survived and keeps relaying.
+        relay.post(game, "P0", "second")
+        await asyncio.sleep(CHAT_FLUSH_INTERVAL * 3)
+        assert len(good.frames) == 2
+
+    asyncio.run(scenario())
+
+def test_slow_room_does_not_delay_other_rooms():
+    async def scenario():
+        relay = ChatRelay(ConnectionManager())
+        slow = RecordingSocket(delay=1.0)
+        fast = RecordingSocket()
+        slow_game = make_room(relay, "SLOW", {"P0": slow})
+        fast_game = make_room(relay, "FAST", {"P0": fast})
+
+        relay.post(slow_game, "P0", "slow")
+        await asyncio.sleep(CHAT_FLUSH_INTERVAL * 2)
+        relay.post(fast_game, "P0", "fast")
+        await asyncio.sleep(CHAT_FLUSH_INTERVAL * 3)
+
+        assert len(fast.frames) == 1
+        assert slow.frames == []
+
+    asyncio.run(scenario())
+
+def test_stalled_socket_is_dropped_and_the_rest_of_the_room_still_receives(monkeypatch):
+    monkeypatch.setattr(chat, "CHAT_SEND_TIMEOUT", 0.1)
+
+    async def scenario():
+        relay = ChatRelay(ConnectionManager())
+        before, stalled, after = RecordingSocket(), RecordingSocket(delay=10), RecordingSocket()
+        game = make_room(relay, "R1", {"P0": before, "P1": stalled, "P2": after})
+
+        relay.post(game, "P0", "hello")
+        await asyncio.sleep(CHAT_FLUSH_INTERVAL + 0.3)
+
+        assert len(before.frames) == 1 and len(after.frames) == 1
+        assert stalled.frames == [] and stalled.close_code == 1011
+        assert set(relay.connections.active_connections["R1"]) == {"P0", "P2"}
+
+    asyncio.run(scenario())
@@ -0,0 +1,73 @@
+import asyncio
+
+from conftest import make_template
+from models import GameConfig, Player, Role, Stage
+from roles import compile_night_plan
+from game_manager import game_manager
+
+# No single death ends the game: two wolves, two other gods, two villagers.
+ROLES = [Role.HUNTER, Role.WEREWOLF, Role.WEREWOLF, Role.KNIGHT, Role.SEER, Role.VILLAGER, Role.VILLAGER]
+
+async def start_game(bots=()):
+    """A seven-player room with ROLES dealt in seat order; seats in `bots` are bots."""
+    game = await game_manager.create_game("host", GameConfig(template_name="6人暗牌局"))
+    for seat in range(1, len(ROLES)):
+        game.players.append(Player(id=f"D{seat}", name=str(seat), seat=seat, is_bot=seat in bots))
+    for player, role in zip(game.players, ROLES):
+        player.role = role
+    game.players[0].is_bot = 0 in bots
+    game_manager._plans[game.room_id] = compile_night_plan(make_template(ROLES), game.players)
+    return game
+
+def test_hunter_killed_at_night_shoots_before_dawn():
+    async def scenario():
+        game = await start_game()
+        hunter = game.players[0].id
+        game.night_actions = {"D1": {"KILL": hunter}}
+        game.stage = Stage.NIGHT_RESOLVE
+
+        await game_manager.advance_stage(game.room_id, Stage.NIGHT_RESOLVE)
+        assert game.stage == Stage.DEATH_SKILL
+        assert game.pending_shooters == [hunter]
+
+        assert not await game_manager.use_day_skill(game.room_id, "D4", "SHOOT", "D1")
+        assert await game_manager.use_day_skill(game.room_id, hunter, "SHOOT", "D1")
+        assert game.stage == Stage.DAWN
+        assert not next(p for p in game.players if p.id == "D1").is_alive
+        game_manager._cancel_timer(game.room_id)
+
+    asyncio.run(scenario())
+
+def test_bot_hunter_voted_out_shoots_on_its_own():
+    async def scenario():
+        game = await start_game(bots=[0])
+        hunter = game.players[0]
+        game.day_votes = {"D1": hunter.id, "D2": hunter.id}
+        game.stage = Stage.VOTE_RESOLVE
+
+        await game_manager.advance_stage(game.room_id, Stage.VOTE_RESOLVE)
+        assert game.stage == Stage.DEATH_SKILL
+
+        await asyncio.sleep(0.3)
+        assert game.stage == Stage.NIGHT_START
+        assert game.pending_shooters == []
+        assert sum(p.is_alive for p in game.players) == len(ROLES) - 2
+        game_manager._cancel_timer(game.room_id)
+
+    asyncio.run(scenario())
+
+def test_won_duel_skips_the_vote():
+    async def scenario():
+        game = await start_game()
+        game.speech_order = [p.id for p in game.players]
+        game.stage = Stage.SPEECH_ORDER
+        await game_manager.advance_stage(game.room_id, Stage.SPEECH_ORDER)
+        assert game.stage == Stage.SPEECH
+
+        assert await game_manager.use_day_skill(game.room_id, "D3", "DUEL", "D2")
+        assert game.stage == Stage.NIGHT_START
+        assert not next(p for p in game.players if p.id == "D2").is_alive
+        assert not await game_manager.use_day_skill(game.room_id, "D3", "DUEL", "D1")
+        game_manager._cancel_timer(game.room_id)
+
+    asyncio.run(scenario())
@@ -0,0 +1,133 @@
+from conftest import make_game, make_template
+from models import Role
+from roles import compile_night_plan
+import game_logic
+
+WOLF_BEAUTY_ROLES = [Role.WOLF_BEAUTY, Role.WEREWOLF, Role.SEER, Role.WITCH, Role.GUARD, Role.VILLAGER, Role.VILLAGER]
+
+def test_charmed_player_dies_with_wolf_beauty_on_vote():
+    game = make_game(WOLF_BEAUTY_ROLES)
+    game.charmed = "P5"
+    game.day_votes = {"P2": "P0", "P3": "P0"}
+
+    result = game_logic.process_day_votes(game)
+
+    assert result.eliminated == "P0"
+    assert result.linked_dead == ["P5"]
+    assert not game.players[5].is_alive
+
+def test_already_dead_charmed_player_is_not_killed_again():
+    game = make_game(WOLF_BEAUTY_ROLES)
+    game.charmed = "P3"
+    game.players[3].is_alive = False
+    game.day_votes = {"P2": "P0", "P4": "P0"}
+
+    result = game_logic.process_day_votes(game)
+
+    assert result.eliminated == "P0"
+    assert result.linked_dead == []
+
+def test_already_dead_charmed_player_is_not_in_night_deaths():
+    game = make_game(WOLF_BEAUTY_ROLES)
+    plan = compile_night_plan(make_template(WOLF_BEAUTY_ROLES), game.players)
+    game.charmed = "P5"
+    game.players[5].is_alive = False
+    game.night_actions = {"P3": {"POISON": "P0"}}
+
+    result, _ = game_logic.process_night_actions(game, plan)
+
+    assert result.dead == ["P0"]
+
+def test_guarded_and_saved_target_dies():
+    game = make_game(WOLF_BEAUTY_ROLES)
+    plan = compile_night_plan(make_template(WOLF_BEAUTY_ROLES), game.players)
+    game.night_actions = {"P1": {"KILL": "P5"}, "P4": {"GUARD": "P5"}, "P3": {"SAVE": None}}
+
+    result, _ = game_logic.process_night_actions(game, plan)
+
+    assert result.saved == "P5"
+    assert result.dead == ["P5"]
+    assert game.last_guarded == "P5"
+
+def test_evil_knight_reflects_seer_check():
+    roles = [Role.EVIL_KNIGHT, Role.WEREWOLF, Role.SEER, Role.VILLAGER]
+    game = make_game(roles)
+    plan = compile_night_plan(make_template(roles), game.players)
+    game.night_actions = {"P2": {"CHECK": "P0"}}
+
+    result, checks = game_logic.process_night_actions(game, plan)
+
+    assert result.dead == ["P2"]
+    assert checks["P2"].result == "WOLF"
+    assert not game.evil_knight_has_reflect
+
+def test_check_game_over_counts_every_wolf_role():
+    game = make_game([Role.HIDDEN_WOLF, Role.SEER, Role.VILLAGER])
+    assert not game_logic.check_game_over(game)
+
+    game.players[0].is_alive = False
+    assert game_logic.check_game_over(game)
+    assert game.winner == "GOOD"
+
+DAY_ROLES = [Role.KNIGHT, Role.WHITE_WOLF_KING, Role.WEREWOLF, Role.HUNTER, Role.IDIOT, Role.WITCH, Role.VILLAGER]
+
+def test_knight_duel_kills_a_wolf_and_ends_the_day():
+    game = make_game(DAY_ROLES)
+
+    result = game_logic.process_day_skill(game, "P0", "DUEL", "KNIGHT_DUEL", "P2")
+
+    assert result.dead == ["P2"]
+    assert game.day_ended
+
+def test_knight_dies_when_dueling_a_good_player():
+    game = make_game(DAY_ROLES)
+
+    result = game_logic.process_day_skill(game, "P0", "DUEL", "KNIGHT_DUEL", "P6")
+
+    assert result.dead == ["P0"]
+    assert not game.day_ended
+
+def test_white_wolf_king_takes_a_hunter_who_then_shoots():
+    game = make_game(DAY_ROLES)
+
+    result = game_logic.process_day_skill(game, "P1", "SELF_DESTRUCT", "WHITE_WOLF_KING_BLAST", "P3")
+
+    assert result.dead == ["P1", "P3"]
+    assert game.day_ended
+    assert game.pending_shooters == ["P3"]
+
+def test_hunter_shoots_unless_poisoned():
+    game = make_game(DAY_ROLES)
+    plan = compile_night_plan(make_template(DAY_ROLES), game.players)
+    game.night_actions = {"P2": {"KILL": "P3"}}
+    game_logic.process_night_actions(game, plan)
+    assert game.pending_shooters == ["P3"]
+
+    game = make_game(DAY_ROLES)
+    game.night_actions = {"P5": {"POISON": "P3"}}
+    game_logic.process_night_actions(game, plan)
+    assert not game.players[3].is_alive
+    assert game.pending_shooters == []
+
+def test_idiot_is_revealed_once_then_eliminated():
+    game = make_game(DAY_ROLES)
+    game.day_votes = {"P1": "P4", "P2": "P4"}
+
+    result = game_logic.process_day_votes(game)
+    assert result.eliminated is None and result.revealed == "P4"
+    assert game.players[4].is_alive
+
+    result = game_logic.process_day_votes(game)
+    assert result.eliminated == "P4"
+    assert not game.players[4].is_alive
+
+def test_charmed_hunter_cannot_shoot():
+    roles = [Role.WOLF_BEAUTY, Role.WEREWOLF, Role.HUNTER, Role.SEER, Role.VILLAGER, Role.VILLAGER]
+    game = make_game(roles)
+    game.charmed = "P2"
+    game.day_votes = {"P3": "P0", "P4": "P0"}
+
+    result = game_logic.process_day_votes(game)
+
+    assert result.linked_dead == ["P2"]
+    assert game.pending_shooters == []
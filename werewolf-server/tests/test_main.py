@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip("httpx")  # required by fastapi.testclient
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from connections import connection_manager  # noqa: E402
+from main import app  # noqa: E402
+
+def test_websocket_session():
+    with TestClient(app) as client:
+        response = client.post("/api/room", json={"host_name": "host", "config": {"template_name": "6人暗牌局"}})
+        assert response.status_code == 200
+        room = response.json()
+
+        with client.websocket_connect(f"/ws?token={room['token']}") as ws:
+            assert ws.receive_json()["type"] == "CONNECTED"
+            assert ws.receive_json()["type"] == "STAGE_CHANGE"
+            assert ws.receive_json() == {"type": "CHAT_HISTORY", "payload": {"messages": []}}
+
+            ws.send_json({"type": "CHAT", "payload": {"text": 42}})
+            assert ws.receive_json() == {"type": "CHAT_REJECTED", "payload": {"reason": "Message must be a string."}}
+
+            ws.send_json({"type": "CHAT", "payload": {"text": "hello"}})
+            frame = ws.receive_json()
+            assert frame["type"] == "CHAT"
+            assert [m["text"] for m in frame["payload"]["messages"]] == ["hello"]
+
+            ws.send_text("not json")
+            assert ws.receive_text() == "Invalid JSON format."
+            ws.send_json({"type": "READY", "payload": "yes"})
+            assert ws.receive_text() == "Invalid message structure."
+
+            ws.send_json({"type": "FILL_BOTS", "payload": {}})
+            stage = ws.receive_json()
+            assert stage["type"] == "STAGE_CHANGE"
+            assert sum(p["is_bot"] for p in stage["payload"]["players"]) == 5
+
+            ws.send_json({"type": "ACTION", "payload": {"action": "KILL", "target": None}})
+            assert ws.receive_json() == {"type": "ACTION_REJECTED", "payload": {"action": "KILL"}}
+
+        assert room["host_player_id"] not in connection_manager.active_connections.get(room["room_id"], {})
@@ -0,0 +1,109 @@
+from conftest import make_game, make_template
+from models import GAME_TEMPLATES, Role, Stage
+from roles import DAY_SKILLS, ROLE_REGISTRY, compile_night_plan, day_skill_for
+
+def test_every_role_is_registered():
+    assert set(ROLE_REGISTRY) == set(Role)
+
+def test_every_role_appears_in_a_template():
+    used = {role for template in GAME_TEMPLATES for role in template.roles}
+    assert used == set(Role)
+
+def test_every_template_compiles():
+    for template in GAME_TEMPLATES:
+        roles = [role for role, count in template.roles.items() for _ in range(count)]
+        assert len(roles) in template.player_counts
+        plan = compile_night_plan(template, make_game(roles).players)
+        assert "WOLF_KILL" in [skill for skill, _ in plan.steps]
+
+def test_every_day_skill_is_registered():
+    for spec in ROLE_REGISTRY.values():
+        assert set(spec.day_skills.values()) <= set(DAY_SKILLS)
+
+HIDDEN_WOLF_ROLES = [Role.WEREWOLF, Role.HIDDEN_WOLF, Role.EVIL_KNIGHT, Role.GUARD, Role.WITCH, Role.VILLAGER]
+
+def _plan_for(roles):
+    game = make_game(roles)
+    return game, compile_night_plan(make_template(roles), game.players)
+
+def test_hidden_wolf_cannot_kill_while_other_wolves_live():
+    game, plan = _plan_for(HIDDEN_WOLF_ROLES)
+    hidden = game.players[1]
+
+    assert plan.skill_for(game, hidden, "KILL") is None
+    assert plan.available_actions(game, hidden) == []
+    assert plan.available_actions(game, game.players[2]) == ["KILL"]
+
+    game.players[0].is_alive = False
+    game.players[2].is_alive = False
+    assert plan.available_actions(game, hidden) == ["KILL"]
+
+def test_guard_cannot_repeat_last_target():
+    game, plan = _plan_for(HIDDEN_WOLF_ROLES)
+    guard = game.players[3]
+    game.last_guarded = "P5"
+
+    assert plan.skill_for(game, guard, "GUARD", "P5") is None
+    assert plan.skill_for(game, guard, "GUARD", "P4") == "GUARD"
+
+def test_witch_actions_follow_remaining_potions():
+    game, plan = _plan_for(HIDDEN_WOLF_ROLES)
+    witch = game.players[4]
+    assert plan.available_actions(game, witch) == ["SAVE", "POISON", "PASS"]
+
+    game.witch_has_save = False
+    assert plan.available_actions(game, witch) == ["POISON", "PASS"]
+
+    game.witch_has_poison = False
+    assert plan.available_actions(game, witch) == []
+
+def test_targets_must_be_living_players():
+    game, plan = _plan_for(HIDDEN_WOLF_ROLES)
+    wolf, witch = game.players[0], game.players[4]
+    game.players[5].is_alive = False
+
+    for action, actor in (("KILL", wolf), ("POISON", witch)):
+        assert plan.skill_for(game, actor, action, "P5") is None
+        assert plan.skill_for(game, actor, action, "nobody") is None
+        assert plan.skill_for(game, actor, action, "P3") is not None
+
+def test_self_target_only_where_the_skill_allows_it():
+    roles = [Role.WOLF_BEAUTY, Role.WEREWOLF, Role.SEER, Role.WITCH, Role.GUARD, Role.VILLAGER]
+    game, plan = _plan_for(roles)
+    beauty, seer, witch, guard = game.players[0], game.players[2], game.players[3], game.players[4]
+
+    assert plan.skill_for(game, beauty, "CHARM", "P0") is None
+    assert plan.skill_for(game, seer, "CHECK", "P2") is None
+    assert plan.skill_for(game, witch, "POISON", "P3") is None
+    assert plan.skill_for(game, guard, "GUARD", "P4") == "GUARD"
+    assert plan.skill_for(game, beauty, "KILL", "P0") == "WOLF_KILL"
+
+def test_day_skills_only_in_their_stage_and_once():
+    game = make_game([Role.KNIGHT, Role.WEREWOLF, Role.HUNTER, Role.VILLAGER])
+    knight, hunter = game.players[0], game.players[2]
+    game.stage = Stage.VOTE
+    assert day_skill_for(game, knight, "DUEL", "P1") is None
+
+    game.stage = Stage.SPEECH
+    assert day_skill_for(game, knight, "DUEL", "P1") == "KNIGHT_DUEL"
+    assert day_skill_for(game, knight, "DUEL", "P0") is None
+    assert day_skill_for(game, hunter, "SHOOT", "P1") is None
+    game.used_day_skills = ["P0"]
+    assert day_skill_for(game, knight, "DUEL", "P1") is None
+
+    game.stage = Stage.DEATH_SKILL
+    hunter.is_alive = False
+    assert day_skill_for(game, hunter, "SHOOT", "P1") is None
+    game.pending_shooters = ["P2"]
+    assert day_skill_for(game, hunter, "SHOOT", "P1") == "SHOOT"
+    assert day_skill_for(game, hunter, "SHOOT", "P2") is None
+
+def test_witch_can_pass_so_the_night_ends_early():
+    game, plan = _plan_for(HIDDEN_WOLF_ROLES)
+    game.night_actions = {"P0": {"KILL": "P5"}, "P2": {"KILL": "P5"}, "P3": {"GUARD": "P0"}}
+    assert not plan.all_acted(game)
+
+    assert plan.skill_for(game, game.players[4], "PASS") == "PASS"
+    game.night_actions["P4"] = {"PASS": None}
+    assert plan.all_acted(game)
+    assert plan.resolve(game).kill_target == "P5"
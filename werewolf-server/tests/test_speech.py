@@ -0,0 +1,49 @@
+import asyncio
+
+import game_manager as game_manager_module
+from models import GameConfig, Player, Role, Stage
+from game_manager import game_manager
+
+async def start_speech(humans: int, bots: int = 0):
+    game = await game_manager.create_game("host", GameConfig(template_name="6人暗牌局"))
+    for seat in range(1, humans + bots):
+        game.players.append(Player(id=f"S{seat}", name=str(seat), seat=seat, is_bot=seat >= humans))
+    for player in game.players:
+        player.role = Role.VILLAGER
+    game.speech_order = [p.id for p in game.players]
+    game.stage = Stage.SPEECH_ORDER
+    await game_manager.advance_stage(game.room_id, Stage.SPEECH_ORDER)
+    return game
+
+def test_finish_speech_sends_a_fresh_turn_not_the_stage_timer():
+    async def scenario():
+        game = await start_speech(humans=3)
+        assert game.stage == Stage.SPEECH
+        assert game.speaker_index == 0
+
+        await game_manager.finish_speech(game.room_id, game.speech_order[1])
+        assert game.speaker_index == 0
+
+        await game_manager.finish_speech(game.room_id, game.speech_order[0])
+        assert game.speaker_index == 1
+        assert game.timer == game_manager_module.SPEECH_TURN_SECONDS
+        assert game_manager.remaining_time(game.room_id) == game_manager_module.SPEECH_TURN_SECONDS
+
+    asyncio.run(scenario())
+
+def test_afk_speaker_loses_the_floor_when_their_turn_expires(monkeypatch):
+    monkeypatch.setattr(game_manager_module, "SPEECH_TURN_SECONDS", 1)
+
+    async def scenario():
+        game = await start_speech(humans=2, bots=2)
+        assert game.speaker_index == 0
+
+        await asyncio.sleep(1.2)
+        assert game.stage == Stage.SPEECH
+        assert game.speaker_index == 1
+
+        # The last human speaker times out too; the remaining speakers are bots.
+        await asyncio.sleep(1.2)
+        assert game.stage == Stage.VOTE
+
+    asyncio.run(scenario())